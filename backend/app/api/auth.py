@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 from typing import Any
 
@@ -8,21 +10,23 @@ from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, User as UserSchema, Token, GoogleUserCreate
 from app.core.security import (
-    verify_password, 
-    get_password_hash, 
+    verify_password_async, 
+    get_password_hash_async, 
     create_access_token, 
     get_current_user
 )
 from app.core.google_auth import verify_google_token, get_or_create_google_user
+from app.core.http_cache import not_modified, REVALIDATE_HEADERS
+from app.api.users import user_etag
 from app.config import settings
 
 router = APIRouter()
 
 @router.post("/register", response_model=UserSchema, status_code=status.HTTP_201_CREATED)
-async def register(user: UserCreate, db: Session = Depends(get_db)) -> Any:
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)) -> Any:
     """Register a new user."""
     # Check if email exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await db.scalar(select(User).where(User.email == user.email))
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -30,7 +34,7 @@ async def register(user: UserCreate, db: Session = Depends(get_db)) -> Any:
         )
     
     # Check if username exists
-    db_user = db.query(User).filter(User.username == user.username).first()
+    db_user = await db.scalar(select(User).where(User.username == user.username))
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -38,7 +42,7 @@ async def register(user: UserCreate, db: Session = Depends(get_db)) -> Any:
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = User(
         email=user.email,
         username=user.username,
@@ -48,22 +52,22 @@ async def register(user: UserCreate, db: Session = Depends(get_db)) -> Any:
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
 @router.post("/login", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Any:
     """Login for access token."""
     # Get user by username
-    user = db.query(User).filter(User.username == form_data.username).first()
+    user = await db.scalar(select(User).where(User.username == form_data.username))
     
-    # If user not found or password doesn't match
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    # If user not found, has no password (Google-only account) or password doesn't match
+    if not user or not user.hashed_password or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -89,11 +93,11 @@ async def login(
 @router.post("/google", response_model=Token)
 async def google_auth(
     token: str = Body(..., embed=True),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Any:
     """Login or register with Google OAuth."""
-    # Verify Google token
-    user_info = verify_google_token(token)
+    # Verify Google token; it may fetch Google's certificates, so keep it off the event loop
+    user_info = await run_in_threadpool(verify_google_token, token)
     
     if not user_info:
         raise HTTPException(
@@ -102,7 +106,7 @@ async def google_auth(
         )
     
     # Get or create user
-    user = get_or_create_google_user(db, user_info)
+    user = await get_or_create_google_user(db, user_info)
     
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -114,6 +118,11 @@ async def google_auth(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserSchema)
-async def get_me(current_user: User = Depends(get_current_user)) -> Any:
+async def get_me(request: Request, response: Response, current_user: User = Depends(get_current_user)) -> Any:
     """Get current user information."""
+    etag = user_etag(current_user)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    response.headers.update({"ETag": etag, **REVALIDATE_HEADERS})
     return current_user
\ No newline at end of file
@@ -1,20 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, BackgroundTasks
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request, Response, Query, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, List, Optional, Literal
+import asyncio
 import os
 import uuid
-import shutil
-import json
-from datetime import datetime
+from urllib.parse import quote
+import aiofiles
+import aiofiles.os
+from datetime import datetime, timezone
 
 from app.database import get_db
 from app.models.user import User
 from app.models.file import File as FileModel, ProcessingStatus
-from app.schemas.file import File as FileSchema, FileList
-from app.core.security import get_current_user
+from app.models.upload_session import UploadSession as UploadSessionModel
+from app.models.reprocess_request import ReprocessRequest
+from app.schemas.file import File as FileSchema, FileList, FileListItem, BatchUploadResult
+from app.schemas.file import UploadSession as UploadSessionSchema, UploadSessionCreate
+from app.core.security import get_current_user, get_current_user_allow_query_token
 from app.config import settings
-from app.core.file_parser import FileParser
+from app.core.uploads import StoredUpload, save_upload_file, new_temp_upload_path
+from app.core.upload_sessions import partial_upload_path, write_chunk, hash_upload
+from app.core.mime import detect_mime_from_buffer
+from app.core.images import generate_thumbnail, thumbnail_key, thumbnail_path
+from app.core.blobs import store_blob, release_file_blob, find_cached_result
+from app.core.storage import storage
+from app.core.http_cache import etag_matches, parse_byte_range, make_etag, not_modified, json_response, response_cache
+from app.core.file_counts import adjust_file_count, get_file_count
+from app.core.pagination import encode_cursor, decode_cursor, keyset_condition
+from app.core.result_cache import result_cache
+from app.core.reprocessing import ReprocessOutcome, schedule_reprocess, find_reprocess_request
+from app.core.events import FileEvent, broker, stream_file_events
 
 router = APIRouter()
 
@@ -27,109 +46,508 @@ def is_valid_file_type(filename: str) -> bool:
     ext = get_extension(filename).lower()
     return ext in settings.ALLOWED_EXTENSIONS
 
+async def _stage_upload(file: UploadFile) -> StoredUpload:
+    """Check the file type and stream the upload to the staging folder."""
+    if not is_valid_file_type(file.filename):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type not allowed. Allowed types: {', '.join(settings.ALLOWED_EXTENSIONS)}"
+        )
+    
+    # Create staging directory if it doesn't exist
+    staging_path = new_temp_upload_path()
+    await aiofiles.os.makedirs(os.path.dirname(staging_path), exist_ok=True)
+    
+    # Stream the file to disk, computing size and checksum on the way
+    return await save_upload_file(file, staging_path)
+
+async def _new_file_record(db: AsyncSession, stored: StoredUpload, original_filename: str,
+                           file_type: Optional[str], owner_id: int) -> FileModel:
+    """Move a staged upload into blob storage and build its (not yet added) File row."""
+    # Reuse stored content and its parse result if these bytes were uploaded before
+    blob, created = await store_blob(db, stored)
+    cached = None if created else await find_cached_result(db, blob.content_hash)
+    
+    return FileModel(
+        filename=os.path.basename(blob.file_path),
+        original_filename=original_filename,
+        file_path=blob.file_path,
+        file_size=blob.file_size,
+        content_hash=blob.content_hash,
+        file_type=file_type or "application/octet-stream",
+        mime_type=detect_mime_from_buffer(stored.header),
+        status=ProcessingStatus.COMPLETED if cached else ProcessingStatus.PENDING,
+        processing_result=cached.processing_result if cached else None,
+        parser_version=cached.parser_version if cached else None,
+        owner_id=owner_id
+    )
+
 @router.post("/upload", response_model=FileSchema, status_code=status.HTTP_201_CREATED)
 async def upload_file(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Any:
     """Upload a file for processing."""
-    # Check if file type is allowed
-    if not is_valid_file_type(file.filename):
+    stored = await _stage_upload(file)
+    db_file = await _new_file_record(db, stored, file.filename, file.content_type, current_user.id)
+    
+    # The processing worker picks up PENDING files from the database
+    db.add(db_file)
+    await adjust_file_count(db, current_user.id, 1)
+    await db.commit()
+    response_cache.invalidate(current_user.id)
+    await db.refresh(db_file)
+    
+    return db_file
+
+@router.post("/upload/batch", response_model=BatchUploadResult)
+async def upload_files_batch(
+    response: Response,
+    files: List[UploadFile] = File(...),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """
+    Upload many files in one request. Each file succeeds or fails on its own;
+    the response is 201 if all were stored, 207 if only some were, else 400.
+    """
+    if len(files) > settings.UPLOAD_BATCH_MAX_FILES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File type not allowed. Allowed types: {', '.join(settings.ALLOWED_EXTENSIONS)}"
+            detail=f"Too many files. At most {settings.UPLOAD_BATCH_MAX_FILES} files per batch"
         )
     
-    # Create upload directory if it doesn't exist
-    os.makedirs(settings.UPLOAD_FOLDER, exist_ok=True)
+    # Stream the files to disk concurrently, keeping per-file errors
+    semaphore = asyncio.Semaphore(settings.UPLOAD_BATCH_CONCURRENCY)
     
-    # Generate unique filename to prevent overwriting
-    ext = get_extension(file.filename)
-    unique_filename = f"{uuid.uuid4()}.{ext}"
-    file_path = os.path.join(settings.UPLOAD_FOLDER, unique_filename)
+    async def stage(file: UploadFile) -> StoredUpload:
+        async with semaphore:
+            return await _stage_upload(file)
     
-    # Save the file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Every file finishes staging before anything is looked at, so a failure
+    # can't leave the others' files behind in staging
+    staged = await asyncio.gather(*[stage(file) for file in files], return_exceptions=True)
     
-    # Create file record in database
-    db_file = FileModel(
-        filename=unique_filename,
-        original_filename=file.filename,
+    # Blob bookkeeping shares the session, so it runs one file at a time
+    items = []
+    records = []
+    try:
+        for stored in staged:
+            # Anything but a rejected file fails the whole batch
+            if isinstance(stored, BaseException) and not isinstance(stored, HTTPException):
+                raise stored
+        
+        for file, stored in zip(files, staged):
+            if isinstance(stored, HTTPException):
+                items.append({"original_filename": file.filename, "status_code": stored.status_code, "error": stored.detail})
+                continue
+            db_file = await _new_file_record(db, stored, file.filename, file.content_type, current_user.id)
+            records.append(db_file)
+            items.append({"original_filename": file.filename, "status_code": status.HTTP_201_CREATED, "file": db_file})
+    except BaseException:
+        # Drop whatever is still in staging
+        for stored in staged:
+            if isinstance(stored, StoredUpload):
+                try:
+                    await aiofiles.os.remove(stored.file_path)
+                except OSError:
+                    pass
+        raise
+    
+    # One flush and one commit for all rows; the ORM sends them as multi-row
+    # INSERTs where the driver supports ordered RETURNING (not SQLite)
+    if records:
+        db.add_all(records)
+        await adjust_file_count(db, current_user.id, len(records))
+        await db.commit()
+        response_cache.invalidate(current_user.id)
+    
+    if len(records) == len(files):
+        response.status_code = status.HTTP_201_CREATED
+    elif records:
+        response.status_code = status.HTTP_207_MULTI_STATUS
+    else:
+        response.status_code = status.HTTP_400_BAD_REQUEST
+    
+    return {"created": len(records), "failed": len(files) - len(records), "files": items}
+
+async def _get_upload_session(db: AsyncSession, session_id: str, owner_id: int) -> UploadSessionModel:
+    upload = await db.scalar(
+        select(UploadSessionModel).where(UploadSessionModel.id == session_id, UploadSessionModel.owner_id == owner_id)
+    )
+    if not upload:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    return upload
+
+@router.post("/uploads", response_model=UploadSessionSchema, status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    upload_in: UploadSessionCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """
+    Start a resumable upload. Send the content with PUT /uploads/{id}?offset=N
+    in as many chunks as needed, then POST /uploads/{id}/complete.
+    """
+    if not is_valid_file_type(upload_in.filename):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type not allowed. Allowed types: {', '.join(settings.ALLOWED_EXTENSIONS)}"
+        )
+    if upload_in.file_size < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid file size")
+    if upload_in.file_size > settings.UPLOAD_SESSION_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Maximum size is {settings.UPLOAD_SESSION_MAX_SIZE} bytes"
+        )
+    
+    session_id = uuid.uuid4().hex
+    file_path = partial_upload_path(session_id)
+    await aiofiles.os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    async with aiofiles.open(file_path, "wb"):
+        pass
+    
+    upload = UploadSessionModel(
+        id=session_id,
+        owner_id=current_user.id,
+        original_filename=upload_in.filename,
+        file_type=upload_in.file_type or "application/octet-stream",
         file_path=file_path,
-        file_size=os.path.getsize(file_path),
-        file_type=file.content_type or "application/octet-stream",
-        status=ProcessingStatus.PENDING,
-        owner_id=current_user.id
+        total_size=upload_in.file_size,
+        received_size=0,
+        expected_hash=upload_in.sha256.lower() if upload_in.sha256 else None
     )
+    db.add(upload)
+    await db.commit()
+    await db.refresh(upload)
     
-    db.add(db_file)
-    db.commit()
-    db.refresh(db_file)
+    return upload
+
+@router.get("/uploads/{session_id}", response_model=UploadSessionSchema)
+async def get_upload_session(
+    session_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """Get the progress of a resumable upload, to find the offset to resume from."""
+    return await _get_upload_session(db, session_id, current_user.id)
+
+@router.put("/uploads/{session_id}", response_model=UploadSessionSchema)
+async def upload_chunk(
+    session_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """
+    Write the raw request body at `offset`, which must equal received_size.
+    The body goes straight into the partial file, with no multipart spooling.
+    """
+    upload = await _get_upload_session(db, session_id, current_user.id)
+    if offset != upload.received_size:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Expected offset {upload.received_size}, got {offset}"
+        )
+    file_path, remaining = upload.file_path, upload.total_size - upload.received_size
+    
+    # Don't hold a pooled connection while the chunk trickles in
+    await db.close()
+    
+    written = await write_chunk(file_path, offset, request.stream(), remaining)
+    
+    # Only the request that wrote from the current offset may advance it
+    result = await db.execute(
+        update(UploadSessionModel)
+        .where(UploadSessionModel.id == session_id, UploadSessionModel.received_size == offset)
+        .values(received_size=offset + written, updated_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    if result.rowcount != 1:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Another chunk was written at this offset"
+        )
+    
+    return await _get_upload_session(db, session_id, current_user.id)
+
+@router.post("/uploads/{session_id}/complete", response_model=FileSchema, status_code=status.HTTP_201_CREATED)
+async def complete_upload_session(
+    session_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """Verify a fully received upload and queue it for processing like a regular upload."""
+    upload = await _get_upload_session(db, session_id, current_user.id)
+    if upload.received_size != upload.total_size:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload incomplete: received {upload.received_size} of {upload.total_size} bytes"
+        )
+    original_filename, file_type, expected_hash = upload.original_filename, upload.file_type, upload.expected_hash
+    await db.close()
+    
+    # Hash the assembled file once, off the event loop
+    try:
+        stored = await run_in_threadpool(hash_upload, upload.file_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    
+    # Claim the session, so a concurrent complete can't store the same file twice
+    result = await db.execute(
+        delete(UploadSessionModel)
+        .where(UploadSessionModel.id == session_id, UploadSessionModel.received_size == UploadSessionModel.total_size)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    
+    if expected_hash and stored.content_hash != expected_hash:
+        # Chunks can't be repaired individually, the client has to start over
+        await db.commit()
+        await aiofiles.os.remove(stored.file_path)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Checksum mismatch, the upload has to be restarted"
+        )
     
-    # Schedule file processing in background
-    background_tasks.add_task(FileParser.process_file, db_file.id, db)
+    # The partial file is renamed into blob storage, never copied
+    db_file = await _new_file_record(db, stored, original_filename, file_type, current_user.id)
+    
+    # The processing worker picks up PENDING files from the database
+    db.add(db_file)
+    await adjust_file_count(db, current_user.id, 1)
+    await db.commit()
+    response_cache.invalidate(current_user.id)
+    await db.refresh(db_file)
     
     return db_file
 
-@router.get("/", response_model=FileList)
+@router.delete("/uploads/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_upload_session(
+    session_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> None:
+    """Abort a resumable upload and discard what was received."""
+    upload = await _get_upload_session(db, session_id, current_user.id)
+    file_path = upload.file_path
+    await db.delete(upload)
+    await db.commit()
+    
+    try:
+        await aiofiles.os.remove(file_path)
+    except OSError:
+        pass
+
+# Extra leading sort key for each sort option; created_at and id always follow
+SORT_COLUMNS = {
+    "created_at": [],
+    "status": [FileModel.status],
+    "file_type": [FileModel.file_type],
+}
+
+# Columns a listing may return; heavy ones like processing_result are never loaded
+LIST_FIELDS = list(FileListItem.model_fields)
+
+# Columns of the file detail response that are read straight from the row
+DETAIL_FIELDS = [name for name in FileSchema.model_fields if name != "processing_result"]
+
+def _cursor_values(file, sort: str) -> list:
+    """JSON-safe sort key of a file row, in SORT_COLUMNS order."""
+    values = [getattr(file, column.key) for column in SORT_COLUMNS[sort]]
+    values = [value.value if isinstance(value, ProcessingStatus) else value for value in values]
+    return values + [file.created_at.isoformat(), file.id]
+
+def _parse_cursor_values(values: list, sort: str) -> list:
+    """Inverse of _cursor_values. Raises ValueError if the values don't fit."""
+    if not isinstance(values, list) or len(values) != len(SORT_COLUMNS[sort]) + 2:
+        raise ValueError("Invalid cursor")
+    *leading, created_at, file_id = values
+    if sort == "status":
+        leading = [ProcessingStatus(leading[0])]
+    if not isinstance(file_id, int):
+        raise ValueError("Invalid cursor")
+    return leading + [datetime.fromisoformat(created_at), file_id]
+
+@router.get("/", response_model=FileList, response_model_exclude_unset=True)
 async def get_files(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    skip: int = Query(0, ge=0, description="Deprecated offset pagination; ignored when a cursor is given"),
+    status_filter: Optional[ProcessingStatus] = Query(None, alias="status"),
+    file_type: Optional[str] = None,
+    sort: Literal["created_at", "status", "file_type"] = "created_at",
+    order: Literal["asc", "desc"] = "asc",
+    include_total: bool = True,
+    fields: Optional[str] = Query(None, description="Comma-separated subset of file fields to return; id is always included"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Any:
-    """Get files uploaded by the current user."""
-    files = db.query(FileModel).filter(
-        FileModel.owner_id == current_user.id
-    ).offset(skip).limit(limit).all()
+    """Get files uploaded by the current user, one page at a time."""
+    cache_key = response_cache.key(request)
+    cached = response_cache.get(current_user.id, cache_key)
+    if cached:
+        etag, body = cached
+        return not_modified(request, etag) or json_response(body, etag)
     
-    total = db.query(FileModel).filter(
+    # Sparse fieldsets: return only the requested columns
+    output_fields = LIST_FIELDS
+    if fields:
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - set(LIST_FIELDS)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}. Allowed fields: {', '.join(LIST_FIELDS)}"
+            )
+        output_fields = [name for name in LIST_FIELDS if name in requested or name == "id"]
+    
+    filters = [FileModel.owner_id == current_user.id]
+    if status_filter is not None:
+        filters.append(FileModel.status == status_filter)
+    if file_type is not None:
+        filters.append(FileModel.file_type == file_type)
+    
+    columns = SORT_COLUMNS[sort] + [FileModel.created_at, FileModel.id]
+    
+    # Project just the output and sort key columns instead of loading whole File rows,
+    # plus the row version the ETag is computed from
+    selected = list(dict.fromkeys(output_fields + [column.key for column in columns] + ["updated_at", "status"]))
+    query = select(*[getattr(FileModel, name) for name in selected]).where(*filters)
+    
+    # Seek past the last row of the previous page instead of counting through it
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+            if position.get("sort") != sort or position.get("order") != order:
+                raise ValueError("Cursor was issued for a different sort order")
+            values = _parse_cursor_values(position.get("values"), sort)
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        query = query.where(keyset_condition(columns, values, descending=order == "desc"))
+    elif skip:
+        query = query.offset(skip)
+    
+    # Fetch one extra row to learn whether there is a next page
+    query = query.order_by(*[column.desc() if order == "desc" else column.asc() for column in columns])
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor({"sort": sort, "order": order, "values": _cursor_values(rows[-1], sort)})
+    
+    # Unfiltered totals come from the per-user counter; filtered ones need a count
+    total = None
+    if include_total:
+        if len(filters) == 1:
+            total = await get_file_count(db, current_user.id)
+        else:
+            total = await db.scalar(select(func.count(FileModel.id)).where(*filters))
+    
+    # Answer revalidations from the row versions, before anything is serialized
+    etag = make_etag(cache_key, total, next_cursor, [(row.id, row.updated_at, row.status) for row in rows])
+    response = not_modified(request, etag)
+    if response:
+        return response
+    
+    files = [{name: row._mapping[name] for name in output_fields} for row in rows]
+    body = FileList.model_validate({"total": total, "files": files, "next_cursor": next_cursor}).model_dump_json(exclude_unset=True)
+    response_cache.set(current_user.id, cache_key, etag, body.encode())
+    return json_response(body, etag)
+
+@router.get("/events")
+async def file_events(
+    ids: str = Query(..., description="Comma-separated ids of the files to watch"),
+    current_user: User = Depends(get_current_user_allow_query_token),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """Stream processing status changes of the given files as Server-Sent Events."""
+    try:
+        file_ids = sorted({int(file_id) for file_id in ids.split(",") if file_id.strip()})
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids must be comma-separated integers")
+    
+    if not file_ids or len(file_ids) > settings.EVENTS_MAX_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Subscribe to between 1 and {settings.EVENTS_MAX_FILES} files"
+        )
+    
+    owned = list(await db.scalars(select(FileModel.id).where(
+        FileModel.id.in_(file_ids),
         FileModel.owner_id == current_user.id
-    ).count()
+    )))
+    if not owned:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    
+    # The stream can stay open for minutes: don't hold a pooled connection for it
+    await db.close()
     
-    return {"total": total, "files": files}
+    return StreamingResponse(
+        stream_file_events(owned),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/{file_id}", response_model=FileSchema)
 async def get_file(
     file_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Any:
     """Get a specific file by ID."""
-    file = db.query(FileModel).filter(
+    cache_key = response_cache.key(request)
+    cached = response_cache.get(current_user.id, cache_key)
+    if cached:
+        etag, body = cached
+        return not_modified(request, etag) or json_response(body, etag)
+    
+    # Load everything but the result, which comes from the decoded-result cache
+    row = (await db.execute(select(*[getattr(FileModel, name) for name in DETAIL_FIELDS]).where(
         FileModel.id == file_id,
         FileModel.owner_id == current_user.id
-    ).first()
+    ))).first()
     
-    if not file:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found"
         )
     
-    # Parse processing_result from JSON string to dict
-    if file.processing_result:
-        try:
-            file.processing_result = json.loads(file.processing_result)
-        except json.JSONDecodeError:
-            file.processing_result = {"error": "Invalid JSON in processing result"}
+    # The result only changes with the row, so a matching ETag skips decoding it
+    etag = make_etag(row.id, row.updated_at, row.status)
+    response = not_modified(request, etag)
+    if response:
+        return response
     
-    return file
+    processing_result = await result_cache.get(db, row.id, row.updated_at, row.status)
+    body = FileSchema.model_validate({**row._mapping, "processing_result": processing_result}).model_dump_json()
+    response_cache.set(current_user.id, cache_key, etag, body.encode())
+    return json_response(body, etag)
 
 @router.delete("/{file_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_file(
     file_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> None:  # Change return type annotation to None
     """Delete a file."""
-    file = db.query(FileModel).filter(
+    file = await db.scalar(select(FileModel).where(
         FileModel.id == file_id,
         FileModel.owner_id == current_user.id
-    ).first()
+    ))
     
     if not file:
         raise HTTPException(
@@ -137,17 +555,28 @@ async def delete_file(
             detail="File not found"
         )
     
-    # Delete file from filesystem
-    try:
-        if os.path.exists(file.file_path):
-            os.remove(file.file_path)
-    except Exception as e:
-        # Continue even if file deletion fails
-        pass
+    # Delete from database, dropping the reference on the shared content
+    unused_path = await release_file_blob(db, file)
+    await db.delete(file)
+    await adjust_file_count(db, current_user.id, -1)
+    await db.commit()
+    result_cache.invalidate(file_id)
+    response_cache.invalidate(current_user.id)
+    await broker.publish(FileEvent.deletion(file_id))
     
-    # Delete from database
-    db.delete(file)
-    db.commit()
+    # Delete the content and its thumbnails once nothing references it
+    if unused_path:
+        try:
+            await run_in_threadpool(storage.delete, unused_path)
+        except Exception:
+            # Continue even if deletion fails
+            pass
+        key = thumbnail_key(file)
+        for path in [thumbnail_path(key, size) for size in settings.THUMBNAIL_SIZES]:
+            try:
+                await aiofiles.os.remove(path)
+            except OSError:
+                pass
     
     # Don't return anything for 204 response
     return
@@ -156,46 +585,214 @@ async def delete_file(
 async def get_file_status(
     file_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Any:
     """Get the processing status of a file."""
-    file = db.query(FileModel).filter(
+    row = (await db.execute(select(FileModel.status, FileModel.updated_at).where(
         FileModel.id == file_id,
         FileModel.owner_id == current_user.id
-    ).first()
+    ))).first()
     
-    if not file:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found"
         )
     
-    # Parse processing_result from JSON string to dict if it exists
-    processing_result = None
-    if file.processing_result:
-        try:
-            processing_result = json.loads(file.processing_result)
-        except json.JSONDecodeError:
-            processing_result = {"error": "Invalid JSON in processing result"}
+    # Polling clients only pay for loading and decoding the result when it changes
+    processing_result = await result_cache.get(db, file_id, row.updated_at, row.status)
     
     return {
-        "status": file.status,
-        "updated_at": file.updated_at,
+        "status": row.status,
+        "updated_at": row.updated_at,
         "processing_result": processing_result
     }
 
+def _render_thumbnail(file_path: str, key: str, size: int) -> str:
+    """Render a thumbnail from stored content, which may have to be fetched first."""
+    with storage.local_path(file_path) as local_path:
+        return generate_thumbnail(local_path, key, size)
+
+@router.get("/{file_id}/thumbnail")
+async def get_file_thumbnail(
+    file_id: int,
+    request: Request,
+    size: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """Get a WebP thumbnail of an image file."""
+    size = size or settings.THUMBNAIL_SIZES[0]
+    if size not in settings.THUMBNAIL_SIZES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Thumbnail size not available. Available sizes: {', '.join(map(str, settings.THUMBNAIL_SIZES))}"
+        )
+    
+    file = await db.scalar(select(FileModel).where(
+        FileModel.id == file_id,
+        FileModel.owner_id == current_user.id
+    ))
+    
+    if not file or not (file.mime_type or "").startswith("image/"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Thumbnail not found"
+        )
+    
+    # Thumbnails are keyed by content, so they never change once rendered
+    key = thumbnail_key(file)
+    etag = f'"{key}-{size}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=31536000, immutable"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    path = thumbnail_path(key, size)
+    if not await aiofiles.os.path.exists(path):
+        # Not rendered yet (or evicted), render it off the event loop
+        try:
+            path = await run_in_threadpool(_render_thumbnail, file.file_path, key, size)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Could not render thumbnail"
+            )
+    
+    return FileResponse(path, media_type="image/webp", headers=headers)
+
+# Content types browsers may render inline; anything else is always downloaded
+INLINE_MIME_TYPES = {"image/jpeg", "image/png", "image/gif", "application/pdf", "text/plain", "text/csv"}
+
+def content_etag(file) -> str:
+    """Strong ETag of a file's bytes, which never change once uploaded."""
+    return f'"{file.content_hash}"' if file.content_hash else f'"file-{file.id}"'
+
+@router.get("/{file_id}/content")
+async def get_file_content(
+    file_id: int,
+    request: Request,
+    download: bool = False,
+    current_user: User = Depends(get_current_user_allow_query_token),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """
+    Get the uploaded bytes of a file. Supports single-range Range requests
+    (with If-Range) and If-None-Match against an ETag of the content hash.
+    """
+    file = (await db.execute(select(
+        FileModel.id, FileModel.file_path, FileModel.file_size, FileModel.content_hash,
+        FileModel.mime_type, FileModel.file_type, FileModel.original_filename
+    ).where(
+        FileModel.id == file_id,
+        FileModel.owner_id == current_user.id
+    ))).first()
+    
+    # Don't hold a pooled connection while the content streams
+    await db.close()
+    
+    if not file:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    
+    etag = content_etag(file)
+    media_type = file.mime_type or file.file_type or "application/octet-stream"
+    disposition = "inline" if media_type in INLINE_MIME_TYPES and not download else "attachment"
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, max-age=31536000, immutable",
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"{disposition}; filename*=UTF-8''{quote(file.original_filename)}",
+        # Uploaded content must never run as a page on the API's origin
+        "X-Content-Type-Options": "nosniff",
+        "Content-Security-Policy": "sandbox",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": headers["Cache-Control"]}
+        )
+    
+    # With If-Range, only send part of the content if the client's copy is still current
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range.strip() == etag:
+        try:
+            byte_range = parse_byte_range(request.headers.get("range"), file.file_size)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                detail="Range not satisfiable",
+                headers={"Content-Range": f"bytes */{file.file_size}"}
+            )
+    
+    if byte_range is None:
+        path = storage.filesystem_path(file.file_path)
+        if path is not None:
+            if not await aiofiles.os.path.isfile(path):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="File content not found"
+                )
+            # Served straight from disk, without passing through Python buffers where the server supports it
+            return FileResponse(path, media_type=media_type, headers=headers)
+        headers["Content-Length"] = str(file.file_size)
+        return StreamingResponse(storage.iter_range(file.file_path), media_type=media_type, headers=headers)
+    
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{file.file_size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        storage.iter_range(file.file_path, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers=headers
+    )
+
+REPROCESS_MESSAGES = {
+    ReprocessOutcome.QUEUED: "File reprocessing started",
+    ReprocessOutcome.ALREADY_QUEUED: "File is already queued for processing",
+    ReprocessOutcome.UNCHANGED: "File was already processed by the current parsers",
+    ReprocessOutcome.REUSED: "Reused the result of a file with the same content",
+}
+
+def _reprocess_response(file_id: int, outcome: ReprocessOutcome) -> dict:
+    return {"message": REPROCESS_MESSAGES[outcome], "file_id": file_id, "outcome": outcome.value}
+
+def _replay_reprocess(previous: ReprocessRequest, file_id: int, response: Response) -> dict:
+    """Answer a retried request with the outcome of the original one."""
+    if previous.file_id != file_id:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used to reprocess another file"
+        )
+    response.headers["Idempotent-Replayed"] = "true"
+    return _reprocess_response(file_id, ReprocessOutcome(previous.outcome))
+
 @router.post("/{file_id}/reprocess", response_model=dict)
 async def reprocess_file(
     file_id: int,
-    background_tasks: BackgroundTasks,
+    response: Response,
+    skip_unchanged: bool = Query(False, description="Don't reparse if the result is from the current parsers"),
+    idempotency_key: Optional[str] = Header(None, max_length=255),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Any:
-    """Reprocess a file."""
-    file = db.query(FileModel).filter(
+    """
+    Reprocess a file. Requests for a file that is pending or being processed
+    join that run, and a retried request with the same Idempotency-Key
+    returns the first one's outcome instead of scheduling again.
+    """
+    if idempotency_key:
+        previous = await find_reprocess_request(db, current_user.id, idempotency_key)
+        if previous:
+            return _replay_reprocess(previous, file_id, response)
+    
+    file = await db.scalar(select(FileModel).where(
         FileModel.id == file_id,
         FileModel.owner_id == current_user.id
-    ).first()
+    ))
     
     if not file:
         raise HTTPException(
@@ -203,12 +800,31 @@ async def reprocess_file(
             detail="File not found"
         )
     
-    # Update status to pending
-    file.status = ProcessingStatus.PENDING
-    file.processing_result = None
-    db.commit()
+    # Put the file back in the queue for the processing worker, recording the key in the same transaction
+    outcome = await schedule_reprocess(db, file, skip_unchanged)
+    if idempotency_key:
+        db.add(ReprocessRequest(
+            owner_id=current_user.id,
+            idempotency_key=idempotency_key,
+            file_id=file_id,
+            outcome=outcome.value
+        ))
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request with the same key committed first; this one's requeue is rolled back
+        await db.rollback()
+        previous = await find_reprocess_request(db, current_user.id, idempotency_key) if idempotency_key else None
+        if previous is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="File changed while scheduling it, try again"
+            )
+        return _replay_reprocess(previous, file_id, response)
     
-    # Schedule file processing in background
-    background_tasks.add_task(FileParser.process_file, file.id, db)
+    if outcome in (ReprocessOutcome.QUEUED, ReprocessOutcome.REUSED):
+        response_cache.invalidate(current_user.id)
+        await db.refresh(file, ["status", "updated_at"])
+        await broker.publish(FileEvent(file.id, file.status, file.updated_at))
     
-    return {"message": "File reprocessing started", "file_id": file_id}
\ No newline at end of file
+    return _reprocess_response(file_id, outcome)
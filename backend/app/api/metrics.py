@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends
+from typing import Any
+
+from app.database import get_pool_status
+from app.core.user_cache import user_cache
+from app.core.result_cache import result_cache
+from app.core.http_cache import response_cache
+from app.core.security import password_hasher, get_current_admin_user
+
+# Pool and queue internals are for operators only
+router = APIRouter(dependencies=[Depends(get_current_admin_user)])
+
+@router.get("/db", response_model=dict)
+async def get_db_metrics() -> Any:
+    """Get database connection pool usage."""
+    return get_pool_status()
+
+
+@router.get("/cache", response_model=dict)
+async def get_cache_metrics() -> Any:
+    """Get cache hit and miss counters."""
+    return {
+        "users": user_cache.stats(),
+        "processing_results": result_cache.stats(),
+        "responses": response_cache.stats(),
+    }
+
+
+@router.get("/password-hashing", response_model=dict)
+async def get_password_hashing_metrics() -> Any:
+    """Get password hashing pool usage and queueing times."""
+    return password_hasher.stats()
@@ -1,20 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Any, List
 
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import User as UserSchema, UserUpdate
-from app.core.security import get_current_user, get_password_hash
+from app.core.security import get_current_user, get_password_hash_async
+from app.core.user_cache import user_cache
+from app.core.http_cache import make_etag, not_modified, REVALIDATE_HEADERS
 
 router = APIRouter()
 
+def user_etag(user: User) -> str:
+    """ETag of a user response; updated_at moves with every change to the row."""
+    return make_etag(*(getattr(user, name) for name in UserSchema.model_fields))
+
 @router.get("/", response_model=List[UserSchema])
 async def get_users(
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Any:
     """
     Retrieve users.
@@ -26,14 +33,16 @@ async def get_users(
             detail="Not enough permissions"
         )
     
-    users = db.query(User).offset(skip).limit(limit).all()
+    users = (await db.scalars(select(User).order_by(User.id).offset(skip).limit(limit))).all()
     return users
 
 @router.get("/{user_id}", response_model=UserSchema)
 async def get_user(
     user_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Any:
     """
     Get a specific user by id.
@@ -46,26 +55,34 @@ async def get_user(
             detail="Not enough permissions"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
+    etag = user_etag(user)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    response.headers.update({"ETag": etag, **REVALIDATE_HEADERS})
     return user
 
 @router.put("/me", response_model=UserSchema)
 async def update_user_me(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Any:
     """Update own user information."""
+    # current_user may be a cached copy, so modify the row from this session
+    current_user = await db.get(User, current_user.id)
+    
     # Update user fields
     if user_update.email is not None:
         # Check if email is already taken
-        db_user = db.query(User).filter(User.email == user_update.email).first()
+        db_user = await db.scalar(select(User).where(User.email == user_update.email))
         if db_user and db_user.id != current_user.id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -75,7 +92,7 @@ async def update_user_me(
     
     if user_update.username is not None:
         # Check if username is already taken
-        db_user = db.query(User).filter(User.username == user_update.username).first()
+        db_user = await db.scalar(select(User).where(User.username == user_update.username))
         if db_user and db_user.id != current_user.id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -84,13 +101,14 @@ async def update_user_me(
         current_user.username = user_update.username
     
     if user_update.password is not None:
-        current_user.hashed_password = get_password_hash(user_update.password)
+        current_user.hashed_password = await get_password_hash_async(user_update.password)
     
     if user_update.profile_picture is not None:
         current_user.profile_picture = user_update.profile_picture
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    await user_cache.invalidate(current_user.id)
     
     return current_user
 
@@ -99,7 +117,7 @@ async def update_user(
     user_id: int,
     user_update: UserUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Any:
     """
     Update a user.
@@ -111,7 +129,7 @@ async def update_user(
             detail="Not enough permissions"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -121,7 +139,7 @@ async def update_user(
     # Update user fields
     if user_update.email is not None:
         # Check if email is already taken
-        db_user = db.query(User).filter(User.email == user_update.email).first()
+        db_user = await db.scalar(select(User).where(User.email == user_update.email))
         if db_user and db_user.id != user_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -131,7 +149,7 @@ async def update_user(
     
     if user_update.username is not None:
         # Check if username is already taken
-        db_user = db.query(User).filter(User.username == user_update.username).first()
+        db_user = await db.scalar(select(User).where(User.username == user_update.username))
         if db_user and db_user.id != user_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -140,7 +158,7 @@ async def update_user(
         user.username = user_update.username
     
     if user_update.password is not None:
-        user.hashed_password = get_password_hash(user_update.password)
+        user.hashed_password = await get_password_hash_async(user_update.password)
     
     if user_update.is_active is not None:
         user.is_active = user_update.is_active
@@ -148,7 +166,8 @@ async def update_user(
     if user_update.profile_picture is not None:
         user.profile_picture = user_update.profile_picture
     
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    await user_cache.invalidate(user.id)
     
     return user
\ No newline at end of file
@@ -13,12 +13,42 @@ class Settings(BaseSettings):
     DB_PASSWORD: str = os.getenv("DB_PASSWORD", "YourStrong@Passw0rd")
     DB_NAME: str = os.getenv("DB_NAME", "anime_portal")
     DB_DRIVER: str = os.getenv("DB_DRIVER", "ODBC+Driver+17+for+SQL+Server")
+    DB_PORT: Optional[int] = int(os.getenv("DB_PORT")) if os.getenv("DB_PORT") else None
+    DB_TRUSTED_CONNECTION: bool = os.getenv("DB_TRUSTED_CONNECTION", "true").lower() == "true"
+    DB_BACKEND: str = os.getenv("DB_BACKEND", "mssql")  # mssql, postgresql or sqlite
+    SQLITE_PATH: str = os.getenv("SQLITE_PATH", "anime_portal.db")
+    DATABASE_URL: Optional[str] = os.getenv("DATABASE_URL")  # Overrides all of the above
+    
+    # Database Connection Pool Settings
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", 30))  # Seconds to wait for a connection
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 1800))  # Seconds before reconnecting
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_FAST_EXECUTEMANY: bool = os.getenv("DB_FAST_EXECUTEMANY", "true").lower() == "true"
     
     # JWT Settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-for-jwt")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Password Hashing Settings
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 64))  # Waiting requests before 503
+    
+    # Authenticated User Cache Settings
+    USER_CACHE_ENABLED: bool = os.getenv("USER_CACHE_ENABLED", "true").lower() == "true"
+    USER_CACHE_TTL: int = int(os.getenv("USER_CACHE_TTL", 30))  # Seconds
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", 10000))
+    USER_CACHE_REDIS_URL: Optional[str] = os.getenv("USER_CACHE_REDIS_URL")  # Shared cache across workers
+    
+    # Processing Result Cache Settings
+    RESULT_CACHE_MAX_SIZE: int = int(os.getenv("RESULT_CACHE_MAX_SIZE", 1000))  # Decoded results kept per process
+    
+    # HTTP Response Cache Settings
+    RESPONSE_CACHE_TTL: float = float(os.getenv("RESPONSE_CACHE_TTL", 0))  # Seconds a serialized file response is reused per process, 0 disables
+    RESPONSE_CACHE_MAX_SIZE: int = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", 1000))
+    
     # Google OAuth Settings
     GOOGLE_CLIENT_ID: Optional[str] = os.getenv("GOOGLE_CLIENT_ID")
     GOOGLE_CLIENT_SECRET: Optional[str] = os.getenv("GOOGLE_CLIENT_SECRET")
@@ -26,8 +56,53 @@ class Settings(BaseSettings):
     
     # File Upload Settings
     UPLOAD_FOLDER: str = os.getenv("UPLOAD_FOLDER", "uploads")
-    ALLOWED_EXTENSIONS: list = ["jpg", "jpeg", "png", "gif", "pdf", "txt", "csv"]
+    ALLOWED_EXTENSIONS: list = ["jpg", "jpeg", "png", "gif", "pdf", "txt", "csv", "xlsx"]
     MAX_CONTENT_LENGTH: int = 16 * 1024 * 1024  # 16MB
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))  # 1MB
+    UPLOAD_BATCH_MAX_FILES: int = int(os.getenv("UPLOAD_BATCH_MAX_FILES", 50))
+    UPLOAD_BATCH_CONCURRENCY: int = int(os.getenv("UPLOAD_BATCH_CONCURRENCY", 8))  # Files written to disk at once
+    MAX_BATCH_CONTENT_LENGTH: int = int(os.getenv("MAX_BATCH_CONTENT_LENGTH", 256 * 1024 * 1024))  # 256MB per request
+    UPLOAD_SESSION_MAX_SIZE: int = int(os.getenv("UPLOAD_SESSION_MAX_SIZE", 1024 * 1024 * 1024))  # 1GB per resumable upload
+    UPLOAD_SESSION_EXPIRE: int = int(os.getenv("UPLOAD_SESSION_EXPIRE", 24 * 60 * 60))  # Seconds without a chunk before a resumable upload is dropped
+
+    # File Storage Settings
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "sharded")  # sharded, local (flat, as before) or s3
+    STORAGE_S3_BUCKET: Optional[str] = os.getenv("STORAGE_S3_BUCKET")
+    STORAGE_S3_PREFIX: str = os.getenv("STORAGE_S3_PREFIX", "uploads")
+    STORAGE_S3_ENDPOINT_URL: Optional[str] = os.getenv("STORAGE_S3_ENDPOINT_URL")  # For MinIO and other S3-compatible stores
+    STORAGE_S3_REGION: Optional[str] = os.getenv("STORAGE_S3_REGION")
+    STORAGE_S3_ACCESS_KEY_ID: Optional[str] = os.getenv("STORAGE_S3_ACCESS_KEY_ID")
+    STORAGE_S3_SECRET_ACCESS_KEY: Optional[str] = os.getenv("STORAGE_S3_SECRET_ACCESS_KEY")
+    STORAGE_CACHE_FOLDER: str = os.getenv("STORAGE_CACHE_FOLDER", "storage_cache")  # Local copies of remote content for parsers
+    STORAGE_CACHE_MAX_SIZE: int = int(os.getenv("STORAGE_CACHE_MAX_SIZE", 10 * 1024 * 1024 * 1024))  # 10GB, 0 disables the cache
+
+    # File Processing Settings
+    MIME_SNIFF_BYTES: int = int(os.getenv("MIME_SNIFF_BYTES", 64 * 1024))
+    CSV_SAMPLE_ROWS: int = int(os.getenv("CSV_SAMPLE_ROWS", 5))
+    CSV_CHUNK_SIZE: int = int(os.getenv("CSV_CHUNK_SIZE", 50000))  # Rows per chunk
+    CSV_COLUMN_STATS: bool = os.getenv("CSV_COLUMN_STATS", "true").lower() == "true"
+    EXCEL_SAMPLE_ROWS: int = int(os.getenv("EXCEL_SAMPLE_ROWS", 5))
+    PDF_MAX_PAGES: int = int(os.getenv("PDF_MAX_PAGES", 500))
+    PDF_MAX_CHARS: int = int(os.getenv("PDF_MAX_CHARS", 200000))  # Total across all pages
+    PDF_PROGRESS_INTERVAL: int = int(os.getenv("PDF_PROGRESS_INTERVAL", 10))  # Pages between progress updates
+    TEXT_CHUNK_SIZE: int = int(os.getenv("TEXT_CHUNK_SIZE", 1024 * 1024))  # Bytes per read
+    THUMBNAIL_FOLDER: str = os.getenv("THUMBNAIL_FOLDER", "thumbnails")
+    THUMBNAIL_SIZES: list = [128, 512]  # Bounding box edge in pixels, the first is the default
+    THUMBNAIL_QUALITY: int = int(os.getenv("THUMBNAIL_QUALITY", 80))
+    TEXT_PREVIEW_LENGTH: int = int(os.getenv("TEXT_PREVIEW_LENGTH", 500))  # Characters
+
+    # Processing Worker Settings
+    WORKER_CONCURRENCY: int = int(os.getenv("WORKER_CONCURRENCY", os.cpu_count() or 1))
+    WORKER_POLL_INTERVAL: float = float(os.getenv("WORKER_POLL_INTERVAL", 1.0))  # Seconds
+    WORKER_STALE_AFTER: int = int(os.getenv("WORKER_STALE_AFTER", 300))  # Seconds without heartbeat
+    WORKER_MAX_ATTEMPTS: int = int(os.getenv("WORKER_MAX_ATTEMPTS", 3))
+    REPROCESS_KEY_EXPIRE: int = int(os.getenv("REPROCESS_KEY_EXPIRE", 86400))  # Seconds an Idempotency-Key of a reprocess request is remembered
+
+    # Processing Status Event Settings
+    EVENTS_REDIS_URL: Optional[str] = os.getenv("EVENTS_REDIS_URL")  # Push from the worker instead of polling the database
+    EVENTS_POLL_INTERVAL: float = float(os.getenv("EVENTS_POLL_INTERVAL", 1.0))  # Seconds between database checks without Redis
+    EVENTS_KEEPALIVE: float = float(os.getenv("EVENTS_KEEPALIVE", 15.0))  # Seconds between keep-alive comments
+    EVENTS_MAX_FILES: int = int(os.getenv("EVENTS_MAX_FILES", 100))  # File ids per subscription
 
     class Config:
         env_file = ".env"
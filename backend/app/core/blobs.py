@@ -0,0 +1,101 @@
+import uuid
+import aiofiles.os
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional, Tuple
+from sqlalchemy import select, update, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.storage import storage
+from app.core.uploads import StoredUpload
+from app.models.blob import Blob
+from app.models.file import File, ProcessingStatus
+
+async def _increment_ref_count(db: AsyncSession, content_hash: str) -> Optional[Blob]:
+    """Take a reference on an existing blob, if there is one."""
+    result = await db.execute(
+        update(Blob)
+        .where(Blob.content_hash == content_hash)
+        .values(ref_count=Blob.ref_count + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return None
+    return await db.scalar(select(Blob).where(Blob.content_hash == content_hash))
+
+async def store_blob(db: AsyncSession, stored: StoredUpload) -> Tuple[Blob, bool]:
+    """
+    Turn a freshly streamed upload into a reference on a shared blob.
+    If identical content is already stored, the upload is discarded and the
+    existing blob is reused. Returns (blob, created). The caller commits.
+    """
+    blob = await _increment_ref_count(db, stored.content_hash)
+    if blob:
+        await aiofiles.os.remove(stored.file_path)
+        return blob, False
+
+    # Each blob generation gets its own name, so deleting the last reference
+    # can never remove a file that a concurrent upload just put in place
+    blob_path = storage.key_for(f"{stored.content_hash}.{uuid.uuid4().hex[:8]}")
+    await run_in_threadpool(storage.put_file, stored.file_path, blob_path)
+
+    try:
+        async with db.begin_nested():
+            blob = Blob(
+                content_hash=stored.content_hash,
+                file_path=blob_path,
+                file_size=stored.file_size,
+                ref_count=1
+            )
+            db.add(blob)
+    except IntegrityError:
+        # Someone stored the same content at the same time, use theirs
+        await run_in_threadpool(storage.delete, blob_path)
+        blob = await _increment_ref_count(db, stored.content_hash)
+        if not blob:
+            raise
+        return blob, False
+
+    return blob, True
+
+async def release_file_blob(db: AsyncSession, file: File) -> Optional[str]:
+    """
+    Drop a file's reference on its blob. Returns the storage key that should
+    be deleted after commit, or None if the content is still in use.
+    """
+    blob_path = None
+    if file.content_hash:
+        blob_path = await db.scalar(select(Blob.file_path).where(Blob.content_hash == file.content_hash))
+
+    # Files stored before content addressing own their file outright
+    if blob_path is None or blob_path != file.file_path:
+        return file.file_path
+
+    await db.execute(
+        update(Blob)
+        .where(Blob.content_hash == file.content_hash)
+        .values(ref_count=Blob.ref_count - 1)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(
+        delete(Blob)
+        .where(Blob.content_hash == file.content_hash, Blob.ref_count <= 0)
+        .execution_options(synchronize_session=False)
+    )
+    return blob_path if result.rowcount == 1 else None
+
+async def find_cached_result(db: AsyncSession, content_hash: str, parser_version: Optional[str] = None):
+    """
+    Return the processing_result and parser_version of an already parsed file
+    with the same content, optionally only one produced by `parser_version`.
+    """
+    conditions = [
+        File.content_hash == content_hash,
+        File.status == ProcessingStatus.COMPLETED,
+        File.processing_result.isnot(None)
+    ]
+    if parser_version is not None:
+        conditions.append(File.parser_version == parser_version)
+    return (await db.execute(
+        select(File.processing_result, File.parser_version)
+        .where(*conditions).order_by(File.updated_at.desc()).limit(1)
+    )).first()
@@ -0,0 +1,103 @@
+import csv
+import mmap
+import os
+import pandas as pd
+from typing import Dict, Any, Optional
+from app.config import settings
+
+# Bytes read to sniff the delimiter
+SNIFF_SIZE = 64 * 1024
+
+# Bytes scanned at a time when counting lines
+SCAN_BLOCK_SIZE = 4 * 1024 * 1024
+
+def sniff_delimiter(file_path: str, encoding: str = "utf-8") -> str:
+    """Guess the CSV delimiter from the start of the file."""
+    with open(file_path, "r", encoding=encoding, errors="replace", newline="") as f:
+        sample = f.read(SNIFF_SIZE)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;\t").delimiter
+    except csv.Error:
+        return ","
+
+def count_lines(file_path: str) -> int:
+    """Count lines with a raw newline scan over a memory-mapped file."""
+    if os.path.getsize(file_path) == 0:
+        return 0
+
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        lines = 0
+        last_byte = b""
+        for offset in range(0, len(mm), SCAN_BLOCK_SIZE):
+            block = mm[offset:offset + SCAN_BLOCK_SIZE]
+            lines += block.count(b"\n")
+            last_byte = block[-1:]
+
+        # A final line without a trailing newline still counts
+        if last_byte != b"\n":
+            lines += 1
+        return lines
+
+def _merge_dtype(current: Optional[str], new: str) -> str:
+    """Combine the dtypes pandas inferred for the same column in different chunks."""
+    if current is None or current == new:
+        return new
+    if {current, new} <= {"int64", "float64"}:
+        return "float64"
+    return "object"
+
+def analyze_csv(
+    file_path: str,
+    encoding: str = "utf-8",
+    sample_rows: int = None,
+    chunk_size: int = None,
+    column_stats: bool = None
+) -> Dict[str, Any]:
+    """
+    Analyze a CSV file with memory bounded by the chunk size.
+    The header and sample rows are read up front. Rows are then counted
+    either by a chunked scan that also collects per-column dtype and null
+    statistics, or by a raw newline count when statistics are disabled.
+    """
+    sample_rows = sample_rows or settings.CSV_SAMPLE_ROWS
+    chunk_size = chunk_size or settings.CSV_CHUNK_SIZE
+    if column_stats is None:
+        column_stats = settings.CSV_COLUMN_STATS
+
+    delimiter = sniff_delimiter(file_path, encoding)
+    read_options = {"sep": delimiter, "encoding": encoding, "encoding_errors": "replace"}
+
+    sample = pd.read_csv(file_path, nrows=sample_rows, **read_options)
+    column_names = [str(column) for column in sample.columns]
+
+    result = {
+        "type": "csv",
+        "columns": len(column_names),
+        "column_names": column_names,
+        "delimiter": delimiter,
+        "sample_data": sample.astype(object).where(sample.notna(), None).to_dict(orient="records"),
+    }
+
+    if column_stats:
+        rows = 0
+        null_counts = {column: 0 for column in column_names}
+        dtypes = {column: None for column in column_names}
+
+        for chunk in pd.read_csv(file_path, chunksize=chunk_size, **read_options):
+            rows += len(chunk)
+            for column, nulls in zip(column_names, chunk.isna().sum().tolist()):
+                null_counts[column] += int(nulls)
+            for column, dtype in zip(column_names, chunk.dtypes):
+                dtypes[column] = _merge_dtype(dtypes[column], str(dtype))
+
+        result["column_stats"] = {
+            column: {"dtype": dtypes[column], "null_count": null_counts[column]}
+            for column in column_names
+        }
+    else:
+        # Approximate: quoted fields spanning several lines are counted once per line
+        rows = max(count_lines(file_path) - 1, 0)
+
+    result["rows"] = rows
+    result["message"] = "CSV processing completed successfully."
+    return result
@@ -0,0 +1,244 @@
+"""
+Processing status events, pushed to clients as Server-Sent Events.
+
+Every API process fans events out to its own subscribers. Events reach it
+through one of two brokers:
+
+- PollingBroker (default): one task per API process checks the subscribed
+  files in a single query every EVENTS_POLL_INTERVAL seconds, however many
+  clients are listening.
+- RedisBroker (EVENTS_REDIS_URL set): the processing worker and the API
+  publish every status change on a Redis channel, nothing is polled.
+"""
+import asyncio
+import contextlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set
+from sqlalchemy import select
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.file import File, ProcessingStatus
+from app.models.types import json_dumps, json_loads
+from app.core.result_cache import result_cache
+
+logger = logging.getLogger("app.events")
+
+CHANNEL = "file-events"
+
+TERMINAL_STATUSES = {ProcessingStatus.COMPLETED, ProcessingStatus.FAILED}
+
+# Files per IN (...) query; SQL Server allows about 2100 parameters
+QUERY_CHUNK_SIZE = 1000
+
+@dataclass(frozen=True)
+class FileEvent:
+    file_id: int
+    status: ProcessingStatus
+    updated_at: Optional[datetime]
+    deleted: bool = False
+
+    @property
+    def version(self) -> tuple:
+        return (self.status, self.updated_at)
+
+    def to_json(self) -> str:
+        return json_dumps({
+            "file_id": self.file_id,
+            "status": self.status.value,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "deleted": self.deleted,
+        })
+
+    @classmethod
+    def from_json(cls, raw) -> "FileEvent":
+        data = json_loads(raw)
+        updated_at = datetime.fromisoformat(data["updated_at"]) if data["updated_at"] else None
+        return cls(data["file_id"], ProcessingStatus(data["status"]), updated_at, data.get("deleted", False))
+
+    @classmethod
+    def deletion(cls, file_id: int) -> "FileEvent":
+        return cls(file_id, ProcessingStatus.FAILED, None, deleted=True)
+
+class LocalBroker:
+    """In-process fan-out of file events to subscriber queues."""
+
+    def __init__(self):
+        self.subscribers: Dict[int, Set[asyncio.Queue]] = {}
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, file_ids: Iterable[int]) -> AsyncIterator[asyncio.Queue]:
+        file_ids = list(file_ids)
+        queue: asyncio.Queue = asyncio.Queue()
+        for file_id in file_ids:
+            self.subscribers.setdefault(file_id, set()).add(queue)
+        self._on_subscribe()
+        try:
+            yield queue
+        finally:
+            for file_id in file_ids:
+                queues = self.subscribers.get(file_id)
+                if queues is not None:
+                    queues.discard(queue)
+                    if not queues:
+                        del self.subscribers[file_id]
+
+    def _on_subscribe(self) -> None:
+        pass
+
+    def dispatch(self, event: FileEvent) -> None:
+        for queue in self.subscribers.get(event.file_id, ()):
+            queue.put_nowait(event)
+
+    async def publish(self, event: FileEvent) -> None:
+        self.dispatch(event)
+
+class PollingBroker(LocalBroker):
+    """Finds status changes by polling the subscribed files while anyone listens."""
+
+    def __init__(self, interval: float):
+        super().__init__()
+        self.interval = interval
+        self.versions: Dict[int, tuple] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _on_subscribe(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._watch())
+
+    async def _poll(self, file_ids: List[int]) -> None:
+        async with AsyncSessionLocal() as db:
+            for start in range(0, len(file_ids), QUERY_CHUNK_SIZE):
+                chunk = file_ids[start:start + QUERY_CHUNK_SIZE]
+                rows = (await db.execute(
+                    select(File.id, File.status, File.updated_at).where(File.id.in_(chunk))
+                )).all()
+                # Files deleted through another API process
+                for file_id in set(chunk) - {row.id for row in rows}:
+                    self.dispatch(FileEvent.deletion(file_id))
+                for row in rows:
+                    event = FileEvent(row.id, row.status, row.updated_at)
+                    if self.versions.get(event.file_id) != event.version:
+                        self.versions[event.file_id] = event.version
+                        self.dispatch(event)
+
+    async def _watch(self) -> None:
+        while self.subscribers:
+            await asyncio.sleep(self.interval)
+            file_ids = list(self.subscribers)
+            # Forget files nobody listens to any more
+            self.versions = {file_id: self.versions[file_id] for file_id in file_ids if file_id in self.versions}
+            try:
+                await self._poll(file_ids)
+            except Exception:
+                logger.exception("Polling file statuses failed")
+
+class RedisBroker(LocalBroker):
+    """Receives events published by every process on a shared Redis channel."""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+        super().__init__()
+        self.client = redis.from_url(url)
+        self._task: Optional[asyncio.Task] = None
+
+    def _on_subscribe(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.client.pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.dispatch(FileEvent.from_json(message["data"]))
+            except Exception:
+                logger.exception("Lost the Redis event subscription, reconnecting")
+                await asyncio.sleep(1)
+
+    async def publish(self, event: FileEvent) -> None:
+        await self.client.publish(CHANNEL, event.to_json())
+
+if settings.EVENTS_REDIS_URL:
+    broker = RedisBroker(settings.EVENTS_REDIS_URL)
+else:
+    broker = PollingBroker(settings.EVENTS_POLL_INTERVAL)
+
+_sync_client = None
+
+def publish_file_event(file: File) -> None:
+    """
+    Announce a committed status change from the processing worker.
+    Without Redis this is a no-op: the API processes poll for changes.
+    """
+    global _sync_client
+    if not settings.EVENTS_REDIS_URL:
+        return
+
+    try:
+        if _sync_client is None:
+            import redis
+            _sync_client = redis.from_url(settings.EVENTS_REDIS_URL)
+        _sync_client.publish(CHANNEL, FileEvent(file.id, file.status, file.updated_at).to_json())
+    except Exception:
+        # Clients still see the change the next time they ask for it
+        logger.exception("Publishing the status of file %d failed", file.id)
+
+def format_sse(event: str, data: str) -> str:
+    """Frame one Server-Sent Event."""
+    return f"event: {event}\ndata: {data}\n\n"
+
+async def stream_file_events(file_ids: List[int]) -> AsyncIterator[str]:
+    """
+    Current status of each file followed by every change, as SSE frames.
+    A file that is deleted gets a "deleted" event and is no longer watched.
+    Ends with a "done" event once all remaining files have finished processing.
+    """
+    sent: Dict[int, tuple] = {}
+    watching = set(file_ids)
+    async with broker.subscribe(file_ids) as queue:
+        # Read the current state only after subscribing, so no change is missed
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(File.id, File.status, File.updated_at).where(File.id.in_(file_ids))
+            )).all()
+        pending = [FileEvent(row.id, row.status, row.updated_at) for row in rows]
+        pending += [FileEvent.deletion(file_id) for file_id in watching - {row.id for row in rows}]
+
+        while True:
+            for event in pending:
+                if event.file_id not in watching:
+                    continue
+                if event.deleted:
+                    watching.discard(event.file_id)
+                    sent.pop(event.file_id, None)
+                    yield format_sse("deleted", json_dumps({"file_id": event.file_id}))
+                    continue
+
+                last = sent.get(event.file_id)
+                if last is not None and last[0] == event.version:
+                    continue
+                sent[event.file_id] = (event.version, event.status)
+
+                async with AsyncSessionLocal() as db:
+                    processing_result = await result_cache.get(db, event.file_id, event.updated_at, event.status)
+
+                yield format_sse("status", json_dumps({
+                    "file_id": event.file_id,
+                    "status": event.status.value,
+                    "updated_at": event.updated_at.isoformat() if event.updated_at else None,
+                    "processing_result": processing_result,
+                }))
+
+            if len(sent) == len(watching) and all(state[1] in TERMINAL_STATUSES for state in sent.values()):
+                yield format_sse("done", json_dumps({"file_ids": list(sent)}))
+                return
+
+            try:
+                pending = [await asyncio.wait_for(queue.get(), timeout=settings.EVENTS_KEEPALIVE)]
+            except asyncio.TimeoutError:
+                pending = []
+                yield ": keep-alive\n\n"
@@ -0,0 +1,34 @@
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.models.file import File
+
+async def adjust_file_count(db: AsyncSession, user_id: int, delta: int) -> None:
+    """Add delta to the user's file counter as part of the current transaction."""
+    # An unknown (NULL) counter stays NULL until get_file_count backfills it.
+    # updated_at is kept, so the counter doesn't invalidate cached users and /me ETags
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(file_count=User.file_count + delta, updated_at=User.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+async def get_file_count(db: AsyncSession, user_id: int) -> int:
+    """The user's number of files, read from the maintained counter."""
+    count = await db.scalar(select(User.file_count).where(User.id == user_id))
+    if count is not None:
+        return count
+
+    # Counter never initialised (account predates it): backfill in one statement
+    await db.execute(
+        update(User)
+        .where(User.id == user_id, User.file_count.is_(None))
+        .values(
+            file_count=select(func.count(File.id)).where(File.owner_id == user_id).scalar_subquery(),
+            updated_at=User.updated_at
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return await db.scalar(select(User.file_count).where(User.id == user_id))
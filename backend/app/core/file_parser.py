@@ -1,150 +1,142 @@
 import os
-import json
-import pandas as pd
-import re
 from typing import Dict, Any, List, Optional
-import magic
-import asyncio
 from app.models.file import File, ProcessingStatus
-from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.config import settings
+from app.core.images import image_metadata, generate_thumbnail, thumbnail_key
+from app.core.mime import detect_mime_from_buffer
+from app.core.storage import storage
+from app.core.pdf_extractor import extract_pdf
+from app.core.csv_analyzer import analyze_csv
+from app.core.excel_analyzer import analyze_workbook
+from app.core.text_stats import detect_encoding, text_statistics
+from app.core.events import publish_file_event
+from app.core.processing import PARSER_VERSION
+
+# Longest first line that is inspected when guessing whether a file is a CSV
+CSV_HEADER_LIMIT = 64 * 1024
+
+# libmagic reports some .xlsx files as plain zip archives, those are matched by extension
+EXCEL_MIME_TYPES = [
+    'application/vnd.ms-excel',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+]
 
 class FileParser:
     """Handles parsing different file types and extracting information."""
     
     @staticmethod
-    async def process_file(file_id: int, db: Session):
-        """Process a file asynchronously."""
-        # Update file status to processing
-        file = db.query(File).filter(File.id == file_id).first()
-        if not file:
-            return {"error": "File not found"}
-        
-        file.status = ProcessingStatus.PROCESSING
-        db.commit()
-        
-        try:
-            # Detect file type using python-magic
-            mime = magic.Magic(mime=True)
-            mime_type = mime.from_file(file.file_path)
-            
-            # Process based on file type
-            result = {}
-            
-            if mime_type.startswith('image/'):
-                result = await FileParser._process_image(file.file_path)
-            elif mime_type == 'application/pdf':
-                result = await FileParser._process_pdf(file.file_path)
-            elif mime_type in ['text/plain', 'text/csv']:
-                result = await FileParser._process_text(file.file_path)
-            elif mime_type in ['application/vnd.ms-excel', 
-                           'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet']:
-                result = await FileParser._process_excel(file.file_path)
-            else:
-                result = {"message": f"Unsupported file type: {mime_type}"}
+    def process_file(file_id: int):
+        """
+        Process a file that has been claimed by a worker.
+        Runs in a worker process and opens its own database session.
+        """
+        with SessionLocal() as db:
+            file = db.query(File).filter(File.id == file_id).first()
+            if not file:
+                return {"error": "File not found"}
+            publish_file_event(file)
             
-            # Update file with results
-            file.status = ProcessingStatus.COMPLETED
-            file.processing_result = json.dumps(result)
-            db.commit()
+            def save_progress(partial: Dict[str, Any]):
+                # Partial results are visible through the status endpoint; the
+                # extractor keeps mutating its dict, so store a snapshot
+                file.processing_result = dict(partial)
+                db.commit()
+                publish_file_event(file)
             
-            return result
-            
-        except Exception as e:
-            # Update file status to failed
-            file.status = ProcessingStatus.FAILED
-            file.processing_result = json.dumps({"error": str(e)})
-            db.commit()
-            return {"error": str(e)}
+            try:
+                # Use the type detected at upload, sniffing only files that predate it
+                mime_type = file.mime_type
+                if not mime_type:
+                    mime_type = file.mime_type = detect_mime_from_buffer(
+                        storage.read_range(file.file_path, 0, settings.MIME_SNIFF_BYTES)
+                    )
+                
+                # Process based on file type; remote content is fetched only for parsers that read it
+                result = {}
+                
+                if mime_type.startswith('image/'):
+                    with storage.local_path(file.file_path) as file_path:
+                        result = FileParser._process_image(file_path, thumbnail_key(file))
+                elif mime_type == 'application/pdf':
+                    with storage.local_path(file.file_path) as file_path:
+                        result = FileParser._process_pdf(file_path, on_progress=save_progress)
+                elif mime_type in ['text/plain', 'text/csv']:
+                    with storage.local_path(file.file_path) as file_path:
+                        result = FileParser._process_text(file_path)
+                elif mime_type in EXCEL_MIME_TYPES or (
+                        mime_type == 'application/zip' and file.original_filename.lower().endswith('.xlsx')):
+                    with storage.local_path(file.file_path) as file_path:
+                        result = FileParser._process_excel(file_path)
+                else:
+                    result = {"message": f"Unsupported file type: {mime_type}"}
+                
+                # Update file with results
+                file.status = ProcessingStatus.COMPLETED
+                file.processing_result = result
+                file.parser_version = PARSER_VERSION
+                db.commit()
+                publish_file_event(file)
+                
+                return result
+                
+            except Exception as e:
+                # Update file status to failed
+                db.rollback()
+                file.status = ProcessingStatus.FAILED
+                file.processing_result = {"error": str(e)}
+                db.commit()
+                publish_file_event(file)
+                return {"error": str(e)}
     
     @staticmethod
-    async def _process_image(file_path: str) -> Dict[str, Any]:
-        """Process image files to extract metadata."""
+    def _process_image(file_path: str, thumbnail_key: str) -> Dict[str, Any]:
+        """Process image files to extract metadata and pre-render thumbnails."""
         try:
-            # This would normally use a library like PIL to get image metadata
-            # For now, just get basic file info
-            stats = os.stat(file_path)
+            result = image_metadata(file_path)
+            for size in settings.THUMBNAIL_SIZES:
+                generate_thumbnail(file_path, thumbnail_key, size)
             
-            return {
-                "file_size_bytes": stats.st_size,
-                "last_modified": stats.st_mtime,
-                "type": "image",
-                "message": "Image processing completed successfully."
-            }
+            result["thumbnail_sizes"] = settings.THUMBNAIL_SIZES
+            result["message"] = "Image processing completed successfully."
+            return result
         except Exception as e:
             return {"error": f"Error processing image: {str(e)}"}
     
     @staticmethod
-    async def _process_pdf(file_path: str) -> Dict[str, Any]:
+    def _process_pdf(file_path: str, on_progress=None) -> Dict[str, Any]:
         """Process PDF files to extract text and metadata."""
         try:
-            # This would normally use a library like PyPDF2 or pdfplumber
-            # For now, just get basic file info
-            stats = os.stat(file_path)
-            
-            return {
-                "file_size_bytes": stats.st_size,
-                "last_modified": stats.st_mtime,
-                "type": "pdf",
-                "message": "PDF processing completed successfully."
-            }
+            return extract_pdf(file_path, on_progress)
         except Exception as e:
             return {"error": f"Error processing PDF: {str(e)}"}
     
     @staticmethod
-    async def _process_text(file_path: str) -> Dict[str, Any]:
+    def _process_text(file_path: str) -> Dict[str, Any]:
         """Process text files including CSV."""
         try:
+            encoding = detect_encoding(file_path)
+            
             # Check if it's likely a CSV
-            with open(file_path, 'r', encoding='utf-8') as f:
-                first_line = f.readline()
+            with open(file_path, 'r', encoding=encoding, errors='replace') as f:
+                first_line = f.readline(CSV_HEADER_LIMIT)
                 
             if ',' in first_line or ';' in first_line or '\t' in first_line:
                 # Try to process as CSV
                 try:
-                    df = pd.read_csv(file_path)
-                    return {
-                        "type": "csv",
-                        "rows": len(df),
-                        "columns": len(df.columns),
-                        "column_names": df.columns.tolist(),
-                        "sample_data": df.head(5).to_dict(orient="records"),
-                        "message": "CSV processing completed successfully."
-                    }
-                except:
+                    return analyze_csv(file_path, encoding=encoding)
+                except Exception:
                     pass
             
             # Process as regular text
-            with open(file_path, 'r', encoding='utf-8') as f:
-                text = f.read()
-            
-            line_count = len(text.splitlines())
-            word_count = len(re.findall(r'\w+', text))
-            char_count = len(text)
-            
-            return {
-                "type": "text",
-                "line_count": line_count,
-                "word_count": word_count,
-                "character_count": char_count,
-                "preview": text[:500] + "..." if len(text) > 500 else text,
-                "message": "Text processing completed successfully."
-            }
+            return text_statistics(file_path, encoding=encoding)
         except Exception as e:
             return {"error": f"Error processing text file: {str(e)}"}
     
     @staticmethod
-    async def _process_excel(file_path: str) -> Dict[str, Any]:
+    def _process_excel(file_path: str) -> Dict[str, Any]:
         """Process Excel files."""
         try:
-            df = pd.read_excel(file_path)
-            return {
-                "type": "excel",
-                "rows": len(df),
-                "columns": len(df.columns),
-                "column_names": df.columns.tolist(),
-                "sheet_names": pd.ExcelFile(file_path).sheet_names,
-                "sample_data": df.head(5).to_dict(orient="records"),
-                "message": "Excel processing completed successfully."
-            }
+            return analyze_workbook(file_path)
         except Exception as e:
-            return {"error": f"Error processing Excel file: {str(e)}"}
\ No newline at end of file
+            return {"error": f"Error processing Excel file: {str(e)}"}
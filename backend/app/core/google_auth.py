@@ -2,18 +2,62 @@ from google.oauth2 import id_token
 from google.auth.transport import requests
 from app.config import settings
 from app.models.user import User
-from sqlalchemy.orm import Session
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+import re
 import secrets
 import string
-from app.core.security import get_password_hash
+import threading
+import time
+from app.core.user_cache import user_cache
+
+class CachingRequest(requests.Request):
+    """
+    Transport that keeps successful GET responses for as long as their
+    Cache-Control max-age allows, so Google's signing certificates are
+    fetched once per rotation instead of on every sign-in.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    @staticmethod
+    def _max_age(response) -> int:
+        cache_control = response.headers.get("cache-control", "")
+        if "no-store" in cache_control or "no-cache" in cache_control:
+            return 0
+        match = re.search(r"max-age=(\d+)", cache_control)
+        return int(match.group(1)) if match else 0
+
+    def __call__(self, url, method="GET", body=None, headers=None, **kwargs):
+        # timeout stays in kwargs, so callers that don't give one keep the library's default
+        if method != "GET" or body is not None:
+            return super().__call__(url, method=method, body=body, headers=headers, **kwargs)
+
+        with self._lock:
+            cached = self._cache.get(url)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        response = super().__call__(url, method=method, headers=headers, **kwargs)
+        max_age = self._max_age(response)
+        if response.status == 200 and max_age > 0:
+            with self._lock:
+                self._cache[url] = (time.monotonic() + max_age, response)
+        return response
+
+# Shared transport: one HTTP session and one certificate cache per process
+google_request = CachingRequest()
 
 def verify_google_token(token: str):
-    """Verify the Google OAuth token."""
+    """Verify the Google OAuth token. Blocking; call it from a worker thread."""
     try:
         # Specify the CLIENT_ID of the app that accesses the backend
         idinfo = id_token.verify_oauth2_token(
-            token, 
-            requests.Request(), 
+            token,
+            google_request,
             settings.GOOGLE_CLIENT_ID
         )
 
@@ -23,49 +67,58 @@ def verify_google_token(token: str):
         # Invalid token
         return None
 
-def get_or_create_google_user(db: Session, user_info: dict):
+async def pick_username(db: AsyncSession, username_base: str) -> str:
+    """Return username_base, or username_base with a random suffix if it is taken."""
+    # One query for the base name and every suffixed variant of it
+    taken = set(await db.scalars(
+        select(User.username).where(or_(
+            User.username == username_base,
+            User.username.startswith(f"{username_base}_", autoescape=True)
+        ))
+    ))
+
+    username = username_base
+    while username in taken:
+        random_suffix = ''.join(secrets.choice(string.ascii_letters + string.digits) for _ in range(4))
+        username = f"{username_base}_{random_suffix}"
+    return username
+
+async def get_or_create_google_user(db: AsyncSession, user_info: dict):
     """Get or create a user from Google OAuth information."""
     # Check if user already exists with this Google ID
-    user = db.query(User).filter(User.google_id == user_info['sub']).first()
-    
+    user = await db.scalar(select(User).where(User.google_id == user_info['sub']))
+
     if user:
         return user
-    
+
     # Check if email already exists
-    user_by_email = db.query(User).filter(User.email == user_info['email']).first()
-    
+    user_by_email = await db.scalar(select(User).where(User.email == user_info['email']))
+
     if user_by_email:
         # Update existing user with Google ID
         user_by_email.google_id = user_info['sub']
         if 'picture' in user_info:
             user_by_email.profile_picture = user_info['picture']
-        db.commit()
-        db.refresh(user_by_email)
+        await db.commit()
+        await db.refresh(user_by_email)
+        await user_cache.invalidate(user_by_email.id)
         return user_by_email
-    
+
     # Create new user
     username_base = user_info.get('name', '').replace(' ', '') or user_info['email'].split('@')[0]
-    username = username_base
-    
-    # Check if username exists, if so, add random characters
-    while db.query(User).filter(User.username == username).first():
-        random_suffix = ''.join(secrets.choice(string.ascii_letters + string.digits) for _ in range(4))
-        username = f"{username_base}_{random_suffix}"
-    
-    # Generate a random password for Google users (they'll login with Google, not password)
-    random_password = ''.join(secrets.choice(string.ascii_letters + string.digits) for _ in range(16))
-    hashed_password = get_password_hash(random_password)
-    
+    username = await pick_username(db, username_base)
+
+    # Google users sign in with Google, so they have no password until they set one
     new_user = User(
         email=user_info['email'],
         username=username,
-        hashed_password=hashed_password,
+        hashed_password=None,
         google_id=user_info['sub'],
         profile_picture=user_info.get('picture')
     )
-    
+
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
-    return new_user
\ No newline at end of file
+    await db.commit()
+    await db.refresh(new_user)
+
+    return new_user
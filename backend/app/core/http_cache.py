@@ -0,0 +1,141 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from fastapi import Request, Response, status
+from app.config import settings
+
+# Clients revalidate with If-None-Match on every use; responses differ per user
+REVALIDATE_HEADERS = {"Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches an ETag. Uses the weak
+    comparison RFC 9110 prescribes for If-None-Match, so W/ prefixes are ignored.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    The (start, end) byte positions, end inclusive, requested by a Range
+    header. Returns None when the whole content should be sent: no header,
+    a unit other than bytes, or several ranges. Raises ValueError if the
+    range can't be satisfied.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, dash, last = spec.strip().partition("-")
+    try:
+        start = int(first) if first else None
+        end = int(last) if last else None
+    except ValueError:
+        # Malformed ranges are ignored, not refused
+        return None
+    if not dash or (start is None and end is None):
+        return None
+
+    if start is None:
+        # Suffix range: the last `end` bytes
+        if end <= 0 or size == 0:
+            raise ValueError("Range not satisfiable")
+        return max(size - end, 0), size - 1
+    if end is not None and end < start:
+        return None
+    if start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, size - 1 if end is None else min(end, size - 1)
+
+def make_etag(*version: Any) -> str:
+    """
+    Weak ETag for a response from the versions of the rows it is built from
+    (ids, updated_at, status...), so it is known before anything is serialized.
+    """
+    digest = hashlib.blake2b(repr(version).encode("utf-8"), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 response if the client already has this version, else None."""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, **REVALIDATE_HEADERS})
+    return None
+
+def json_response(body: bytes, etag: str) -> Response:
+    """A 200 response carrying an already serialized JSON body."""
+    return Response(content=body, media_type="application/json", headers={"ETag": etag, **REVALIDATE_HEADERS})
+
+class ResponseCache:
+    """
+    Short-lived per-process cache of serialized responses, per user and URL.
+    Write endpoints invalidate the user's entries in this process; changes
+    made elsewhere (other API processes, the processing worker) show up once
+    an entry expires, so the TTL bounds how stale a response can be.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries: "OrderedDict[Tuple[int, str], Tuple[float, str, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @staticmethod
+    def key(request: Request) -> str:
+        # The token may be in the query; it doesn't change the response
+        params = sorted((k, v) for k, v in request.query_params.multi_items() if k != "access_token")
+        return request.url.path + "?" + "&".join(f"{k}={v}" for k, v in params)
+
+    def get(self, user_id: int, key: str) -> Optional[Tuple[str, bytes]]:
+        """The (etag, body) cached for a user's request, if still fresh."""
+        if not self.enabled:
+            return None
+        entry = self.entries.get((user_id, key))
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end((user_id, key))
+        return entry[1], entry[2]
+
+    def set(self, user_id: int, key: str, etag: str, body: bytes) -> None:
+        if not self.enabled:
+            return
+        self.entries[(user_id, key)] = (time.monotonic() + self.ttl, etag, body)
+        self.entries.move_to_end((user_id, key))
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop every cached response of a user."""
+        for entry_key in [entry_key for entry_key in self.entries if entry_key[0] == user_id]:
+            del self.entries[entry_key]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "size": len(self.entries),
+        }
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_TTL, settings.RESPONSE_CACHE_MAX_SIZE)
@@ -0,0 +1,79 @@
+import os
+import uuid
+from typing import Dict, Any
+from PIL import Image, ExifTags, ImageOps
+from app.config import settings
+
+# Longest EXIF string value kept in processing results
+MAX_EXIF_VALUE_LENGTH = 256
+
+def _exif_value(value: Any) -> Any:
+    """Convert an EXIF value into something JSON serializable."""
+    if isinstance(value, bytes):
+        return None
+    if isinstance(value, (tuple, list)):
+        return [_exif_value(item) for item in value]
+    if isinstance(value, (int, str, bool)) or value is None:
+        return value[:MAX_EXIF_VALUE_LENGTH] if isinstance(value, str) else value
+    try:
+        # IFDRational and friends
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)[:MAX_EXIF_VALUE_LENGTH]
+
+def image_metadata(file_path: str) -> Dict[str, Any]:
+    """
+    Read dimensions, format, color mode and EXIF from the image header.
+    Image.open is lazy, so the pixel data is never decoded here.
+    """
+    with Image.open(file_path) as img:
+        exif = {
+            ExifTags.TAGS.get(tag, str(tag)): _exif_value(value)
+            for tag, value in img.getexif().items()
+        }
+        return {
+            "type": "image",
+            "format": img.format,
+            "width": img.width,
+            "height": img.height,
+            "mode": img.mode,
+            "frames": getattr(img, "n_frames", 1),
+            "exif": {tag: value for tag, value in exif.items() if value is not None},
+        }
+
+def thumbnail_key(file) -> str:
+    """Thumbnails are shared by every file with the same content."""
+    return file.content_hash or f"file-{file.id}"
+
+def thumbnail_path(key: str, size: int) -> str:
+    """Location of the cached thumbnail for some content at a given size."""
+    return os.path.join(settings.THUMBNAIL_FOLDER, f"{key}_{size}.webp")
+
+def generate_thumbnail(file_path: str, key: str, size: int) -> str:
+    """
+    Create a thumbnail that fits in size x size and return its path.
+    JPEGs are decoded at reduced scale through draft mode. Other formats have
+    no such mode and are decoded at full size, then shrunk with reduce()
+    before resampling, so they are refused above Image.MAX_IMAGE_PIXELS.
+    """
+    os.makedirs(settings.THUMBNAIL_FOLDER, exist_ok=True)
+    dest_path = thumbnail_path(key, size)
+
+    with Image.open(file_path) as img:
+        img.draft("RGB", (size, size))
+        # After draft() the size is what load() will actually decode
+        if Image.MAX_IMAGE_PIXELS and img.width * img.height > Image.MAX_IMAGE_PIXELS:
+            raise Image.DecompressionBombError(
+                f"Image size ({img.width * img.height} pixels) exceeds limit of {Image.MAX_IMAGE_PIXELS} pixels"
+            )
+        img.thumbnail((size, size), reducing_gap=2.0)
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+
+        # Write under a temporary name so readers never see a partial file
+        tmp_path = f"{dest_path}.{uuid.uuid4().hex}.tmp"
+        img.save(tmp_path, format="WEBP", quality=settings.THUMBNAIL_QUALITY)
+        os.replace(tmp_path, dest_path)
+
+    return dest_path
@@ -0,0 +1,22 @@
+import threading
+import magic
+from app.config import settings
+
+# libmagic handles are expensive to open and not thread-safe, so each
+# thread keeps one for its whole lifetime
+_local = threading.local()
+
+def _get_magic() -> magic.Magic:
+    handle = getattr(_local, "magic", None)
+    if handle is None:
+        handle = _local.magic = magic.Magic(mime=True)
+    return handle
+
+def detect_mime_from_buffer(header: bytes) -> str:
+    """Detect a MIME type from the first bytes of a file."""
+    return _get_magic().from_buffer(header[:settings.MIME_SNIFF_BYTES])
+
+def detect_mime_from_file(file_path: str) -> str:
+    """Detect a MIME type by reading only the head of a file."""
+    with open(file_path, "rb") as f:
+        return detect_mime_from_buffer(f.read(settings.MIME_SNIFF_BYTES))
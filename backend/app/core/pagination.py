@@ -0,0 +1,32 @@
+import base64
+import json
+from typing import Any, List, Sequence
+from sqlalchemy import and_, or_
+
+def encode_cursor(data: dict) -> str:
+    """Encode a pagination position as an opaque URL-safe string."""
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> dict:
+    """Decode a cursor made by encode_cursor. Raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(data, dict):
+        raise ValueError("Invalid cursor")
+    return data
+
+def keyset_condition(columns: Sequence, values: List[Any], descending: bool = False):
+    """
+    Rows strictly after `values` in the ordering of `columns`. Expanded to
+    (a > x) OR (a = x AND b > y) ... since not every backend supports row
+    value comparisons, and this form still lets the database seek the index.
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        after = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*[columns[j] == values[j] for j in range(i)], after))
+    return or_(*clauses)
@@ -0,0 +1,62 @@
+from typing import Dict, Any, Iterator, Callable, Optional
+from pypdf import PdfReader
+from app.config import settings
+
+def pdf_metadata(reader: PdfReader) -> Dict[str, str]:
+    """Document information dictionary as plain strings."""
+    metadata = reader.metadata or {}
+    return {key.lstrip("/"): str(value) for key, value in metadata.items()}
+
+def iter_pdf_pages(reader: PdfReader, max_pages: int, max_chars: int) -> Iterator[Dict[str, Any]]:
+    """
+    Extract text one page at a time.
+    Stops after max_pages pages or once max_chars characters have been
+    returned in total; the last page is cut to fit the character budget.
+    """
+    remaining = max_chars
+    for index, page in enumerate(reader.pages):
+        if index >= max_pages or remaining <= 0:
+            return
+
+        text = page.extract_text() or ""
+        yield {
+            "page": index + 1,
+            "character_count": len(text),
+            "text": text[:remaining],
+        }
+        remaining -= len(text)
+
+def extract_pdf(
+    file_path: str,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Extract page count, metadata and per-page text from a PDF.
+    on_progress is called with the partial result every
+    PDF_PROGRESS_INTERVAL pages so callers can publish progress.
+    """
+    reader = PdfReader(file_path)
+    if reader.is_encrypted:
+        # Many PDFs are "encrypted" with an empty user password
+        reader.decrypt("")
+
+    page_count = len(reader.pages)
+    result = {
+        "type": "pdf",
+        "page_count": page_count,
+        "metadata": pdf_metadata(reader),
+        "pages": [],
+        "pages_processed": 0,
+        "partial": True,
+    }
+
+    for page in iter_pdf_pages(reader, settings.PDF_MAX_PAGES, settings.PDF_MAX_CHARS):
+        result["pages"].append(page)
+        result["pages_processed"] = page["page"]
+        if on_progress and page["page"] % settings.PDF_PROGRESS_INTERVAL == 0:
+            on_progress(result)
+
+    result["partial"] = False
+    result["truncated"] = result["pages_processed"] < page_count
+    result["message"] = "PDF processing completed successfully."
+    return result
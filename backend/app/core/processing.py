@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List
+from sqlalchemy import update, or_
+from sqlalchemy.orm import Session
+from app.models.file import File, ProcessingStatus
+
+# Version of the parsers' output, stored with each result. Bump it when a
+# parser changes what it extracts, so unchanged results can be told apart
+PARSER_VERSION = "1"
+
+def claim_file(db: Session, file_id: int) -> bool:
+    """
+    Atomically move a file from PENDING to PROCESSING.
+    Returns False if another worker claimed it first.
+    """
+    result = db.execute(
+        update(File)
+        .where(File.id == file_id, File.status == ProcessingStatus.PENDING)
+        .values(
+            status=ProcessingStatus.PROCESSING,
+            processing_attempts=File.processing_attempts + 1,
+            updated_at=datetime.now(timezone.utc),
+            heartbeat_at=datetime.now(timezone.utc)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def claim_pending_files(db: Session, limit: int) -> List[int]:
+    """Claim up to `limit` pending files, oldest first."""
+    if limit <= 0:
+        return []
+
+    # Over-fetch candidates since other workers may win some of the claims
+    candidates = db.query(File.id).filter(
+        File.status == ProcessingStatus.PENDING
+    ).order_by(File.created_at, File.id).limit(limit * 2).all()
+
+    claimed = []
+    for (file_id,) in candidates:
+        if claim_file(db, file_id):
+            claimed.append(file_id)
+            if len(claimed) >= limit:
+                break
+
+    return claimed
+
+def heartbeat(db: Session, file_ids: Iterable[int]) -> None:
+    """
+    Refresh heartbeat_at on files that are still being processed. updated_at
+    is left alone: it versions the row for ETags and the result cache.
+    """
+    file_ids = list(file_ids)
+    if not file_ids:
+        return
+
+    db.execute(
+        update(File)
+        .where(File.id.in_(file_ids), File.status == ProcessingStatus.PROCESSING)
+        # Keep the column's onupdate from bumping updated_at
+        .values(heartbeat_at=datetime.now(timezone.utc), updated_at=File.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+def requeue_orphaned_files(db: Session, stale_after: int, max_attempts: int) -> int:
+    """
+    Recover files left in PROCESSING by a crashed worker.
+    Files that have used up their attempts are marked FAILED instead of
+    being retried forever.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=stale_after)
+    orphaned = (
+        File.status == ProcessingStatus.PROCESSING,
+        or_(File.heartbeat_at.is_(None), File.heartbeat_at < cutoff)
+    )
+
+    failed = db.execute(
+        update(File)
+        .where(*orphaned, File.processing_attempts >= max_attempts)
+        .values(
+            status=ProcessingStatus.FAILED,
+            processing_result={"error": "Processing was interrupted too many times"}
+        )
+        .execution_options(synchronize_session=False)
+    )
+    requeued = db.execute(
+        update(File)
+        .where(*orphaned)
+        .values(status=ProcessingStatus.PENDING)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return failed.rowcount + requeued.rowcount
+
+def release_files(db: Session, file_ids: Iterable[int], max_attempts: int) -> None:
+    """Put claimed files back into the queue, e.g. after a worker pool crash."""
+    file_ids = list(file_ids)
+    if not file_ids:
+        return
+
+    claimed = (File.id.in_(file_ids), File.status == ProcessingStatus.PROCESSING)
+    db.execute(
+        update(File)
+        .where(*claimed, File.processing_attempts >= max_attempts)
+        .values(
+            status=ProcessingStatus.FAILED,
+            processing_result={"error": "Worker process crashed while processing this file"}
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(File)
+        .where(*claimed)
+        .values(status=ProcessingStatus.PENDING)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
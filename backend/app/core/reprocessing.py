@@ -0,0 +1,64 @@
+import enum
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.blobs import find_cached_result
+from app.core.processing import PARSER_VERSION
+from app.models.file import File, ProcessingStatus
+from app.models.reprocess_request import ReprocessRequest
+
+class ReprocessOutcome(str, enum.Enum):
+    QUEUED = "queued"  # Back in the queue for the processing worker
+    ALREADY_QUEUED = "already_queued"  # Pending or being processed, the request joins that run
+    UNCHANGED = "unchanged"  # Result is from the current parsers, nothing to do
+    REUSED = "reused"  # Result copied from a file with the same content and parser version
+
+# A file can only be rescheduled once its current run has finished
+FINISHED = (ProcessingStatus.COMPLETED, ProcessingStatus.FAILED)
+
+async def schedule_reprocess(db: AsyncSession, file: File, skip_unchanged: bool = False) -> ReprocessOutcome:
+    """
+    Put a file back in the processing queue. The status moves in a single
+    conditional UPDATE, so of several concurrent requests exactly one
+    requeues the file and at most one worker parses it. Doesn't commit.
+    """
+    if file.status not in FINISHED:
+        return ReprocessOutcome.ALREADY_QUEUED
+
+    values = dict(status=ProcessingStatus.PENDING, processing_result=None, processing_attempts=0, parser_version=None)
+    outcome = ReprocessOutcome.QUEUED
+    if skip_unchanged:
+        if file.status == ProcessingStatus.COMPLETED and file.parser_version == PARSER_VERSION:
+            return ReprocessOutcome.UNCHANGED
+        # Content never changes, so a result of the same bytes by the same parsers is as good as a parse
+        cached = await find_cached_result(db, file.content_hash, PARSER_VERSION) if file.content_hash else None
+        if cached:
+            values = dict(status=ProcessingStatus.COMPLETED, processing_result=cached.processing_result,
+                          parser_version=PARSER_VERSION)
+            outcome = ReprocessOutcome.REUSED
+
+    result = await db.execute(
+        update(File)
+        .where(File.id == file.id, File.status.in_(FINISHED))
+        .values(**values, updated_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    return outcome if result.rowcount == 1 else ReprocessOutcome.ALREADY_QUEUED
+
+async def find_reprocess_request(db: AsyncSession, owner_id: int, idempotency_key: str):
+    return await db.scalar(select(ReprocessRequest).where(
+        ReprocessRequest.owner_id == owner_id,
+        ReprocessRequest.idempotency_key == idempotency_key
+    ))
+
+def expire_reprocess_requests(db: Session, max_age: int) -> int:
+    """Forget Idempotency-Keys of reprocess requests older than `max_age` seconds."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=max_age)
+    result = db.execute(
+        delete(ReprocessRequest)
+        .where(ReprocessRequest.created_at < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
@@ -0,0 +1,53 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Dict, Any
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.file import File, ProcessingStatus
+
+class ResultCache:
+    """
+    Per-process LRU of decoded processing results, one entry per file.
+    An entry is valid for a (updated_at, status) version of the row, so
+    status polling only loads and decodes the result after it changes.
+    Cached dicts are shared between requests and must not be modified.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries: "OrderedDict[int, tuple[tuple, Optional[Dict[str, Any]]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, db: AsyncSession, file_id: int, updated_at: Optional[datetime],
+                  status: ProcessingStatus) -> Optional[Dict[str, Any]]:
+        """The file's processing result, loading it if the cached version is stale."""
+        version = (updated_at, status)
+        entry = self.entries.get(file_id)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            self.entries.move_to_end(file_id)
+            return entry[1]
+
+        self.misses += 1
+        result = await db.scalar(select(File.processing_result).where(File.id == file_id))
+        self.entries[file_id] = (version, result)
+        self.entries.move_to_end(file_id)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return result
+
+    def invalidate(self, file_id: int) -> None:
+        self.entries.pop(file_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "size": len(self.entries),
+        }
+
+result_cache = ResultCache(settings.RESULT_CACHE_MAX_SIZE)
@@ -1,20 +1,25 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
 from app.schemas.user import TokenData
 from app.database import get_db
 from app.models.user import User
+from app.core.user_cache import user_cache
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
 
 def verify_password(plain_password, hashed_password):
     """Verify if the provided password matches the hashed password."""
@@ -24,6 +29,72 @@ def get_password_hash(password):
     """Generate a hash for the provided password."""
     return pwd_context.hash(password)
 
+class PasswordHasher:
+    """
+    Runs bcrypt in a bounded thread pool so hashing never blocks the event loop.
+    Requests beyond the pool plus PASSWORD_HASH_MAX_QUEUE are rejected with 503.
+    """
+    
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.run_time_total = 0.0
+    
+    async def run(self, func, *args):
+        if self.pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, please retry",
+                headers={"Retry-After": "1"},
+            )
+        
+        submitted = time.perf_counter()
+        
+        def timed():
+            started = time.perf_counter()
+            return func(*args), started - submitted, time.perf_counter() - started
+        
+        self.pending += 1
+        try:
+            result, queue_wait, run_time = await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        finally:
+            self.pending -= 1
+        
+        self.completed += 1
+        self.queue_wait_total += queue_wait
+        self.queue_wait_max = max(self.queue_wait_max, queue_wait)
+        self.run_time_total += run_time
+        return result
+    
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "queued": max(0, self.pending - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_avg_ms": self.queue_wait_total / self.completed * 1000 if self.completed else 0.0,
+            "queue_wait_max_ms": self.queue_wait_max * 1000,
+            "run_time_avg_ms": self.run_time_total / self.completed * 1000 if self.completed else 0.0,
+        }
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
+
+async def verify_password_async(plain_password, hashed_password):
+    """Verify a password in the hashing pool."""
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    """Hash a password in the hashing pool."""
+    return await password_hasher.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -38,7 +109,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     """Get the current user from the JWT token."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -58,16 +129,40 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except JWTError:
         raise credentials_exception
     
-    # Get the user from database
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+    # Get the user from the cache, falling back to the database
+    user = await user_cache.get(token_data.user_id)
+    if user is None:
+        user = await db.get(User, token_data.user_id)
+        if user is not None:
+            await user_cache.set(user)
     
     if user is None or not user.is_active:
         raise credentials_exception
         
     return user
 
+async def get_current_user_allow_query_token(
+    token: Optional[str] = Depends(oauth2_scheme_optional),
+    access_token: Optional[str] = Query(None, description="JWT for clients that cannot send headers, like EventSource"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the current user from the Authorization header or an access_token query parameter."""
+    if not token and not access_token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await get_current_user(token or access_token, db)
+
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     """Verify that the current user is active."""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def get_current_admin_user(current_user: User = Depends(get_current_user)):
+    """Verify that the current user is an admin."""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    return current_user
@@ -0,0 +1,445 @@
+"""
+Where uploaded file content lives.
+
+Content is addressed by a storage key, the value kept in Blob.file_path and
+File.file_path. Three backends implement the same interface:
+
+- LocalStorage: keys are paths directly under UPLOAD_FOLDER on local disk.
+- ShardedLocalStorage: the same, spread over hash-prefix subdirectories.
+- S3Storage: objects in an S3-compatible bucket (AWS, MinIO, ...), shared by
+  every API and worker node. Parsers that need a real file get a copy from
+  a bounded local read-through cache.
+
+Uploads are always staged on local disk first and handed over with put_file.
+"""
+import os
+import uuid
+import hashlib
+import shutil
+import contextlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Iterator, List, Optional
+from app.config import settings
+
+@dataclass
+class StoredObject:
+    key: str
+    size: int
+    modified: float  # Unix timestamp
+
+class Storage(ABC):
+    """Interface shared by the storage backends. All methods block."""
+
+    @abstractmethod
+    def key_for(self, name: str) -> str:
+        """Storage key for new content stored under a file name."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def put_file(self, local_path: str, key: str) -> None:
+        """Move a local file into storage under key. The local file is consumed."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Open stored content for streaming reads."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def read_range(self, key: str, start: int, length: int) -> bytes:
+        """Read up to length bytes from offset start."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None,
+                   chunk_size: int = None) -> Iterator[bytes]:
+        """Stream bytes start..end (inclusive; None means to the end) in chunks."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def size(self, key: str) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove stored content; missing content is not an error."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def copy_in(self, local_path: str, key: str) -> None:
+        """Store a copy of a local file under key, keeping the local file."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def shards(self) -> List[str]:
+        """Disjoint parts of the stored keys that can be listed independently."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_objects(self, shard: str) -> Iterator[StoredObject]:
+        """Every stored object in a shard, in no particular order."""
+        raise NotImplementedError
+
+    @abstractmethod
+    @contextlib.contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        """A path on local disk with the content, for parsers that need a real file."""
+        raise NotImplementedError
+
+    def filesystem_path(self, key: str) -> Optional[str]:
+        """The content's own file on local disk, which can be sent with sendfile, if there is one."""
+        return None
+
+    def normalize_key(self, key: str) -> str:
+        """A spelling of key that is equal for every key naming the same object."""
+        return key
+
+class LocalStorage(Storage):
+    """Content in a single directory on local disk; keys are the file paths."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def key_for(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def put_file(self, local_path: str, key: str) -> None:
+        os.makedirs(os.path.dirname(key) or ".", exist_ok=True)
+        os.replace(local_path, key)
+
+    def open(self, key: str) -> BinaryIO:
+        return open(key, "rb")
+
+    def read_range(self, key: str, start: int, length: int) -> bytes:
+        with open(key, "rb") as f:
+            f.seek(start)
+            return f.read(length)
+
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None,
+                   chunk_size: int = None) -> Iterator[bytes]:
+        chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+        with open(key, "rb") as f:
+            f.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(key)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(key)
+        except FileNotFoundError:
+            pass
+
+    def copy_in(self, local_path: str, key: str) -> None:
+        os.makedirs(os.path.dirname(key) or ".", exist_ok=True)
+        try:
+            # A second name for the same inode: instant, and takes no extra space
+            os.link(local_path, key)
+        except FileExistsError:
+            pass
+        except OSError:
+            tmp_path = f"{key}.{uuid.uuid4().hex}.tmp"
+            shutil.copyfile(local_path, tmp_path)
+            os.replace(tmp_path, key)
+
+    def shards(self) -> List[str]:
+        # Each subdirectory, plus the files directly in the root ("").
+        # Names starting with a dot, like the .tmp staging folder, are not stored content.
+        try:
+            with os.scandir(self.root) as entries:
+                subdirs = [entry.name for entry in entries
+                           if entry.is_dir(follow_symlinks=False) and not entry.name.startswith(".")]
+        except FileNotFoundError:
+            return []
+        return [""] + sorted(subdirs)
+
+    def list_objects(self, shard: str) -> Iterator[StoredObject]:
+        stack = [os.path.join(self.root, shard) if shard else self.root]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except FileNotFoundError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.name.startswith(".") or entry.name.endswith(".tmp"):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        # The root shard only covers the files directly in it
+                        if shard:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        yield StoredObject(entry.path, stat.st_size, stat.st_mtime)
+
+    @contextlib.contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        yield key
+
+    def filesystem_path(self, key: str) -> Optional[str]:
+        return key
+
+    def normalize_key(self, key: str) -> str:
+        return os.path.normcase(os.path.abspath(key))
+
+class ShardedLocalStorage(LocalStorage):
+    """
+    Local content spread over two levels of hash-prefix directories
+    (ab/cd/abcd...), so no directory grows to millions of entries.
+    """
+
+    def key_for(self, name: str) -> str:
+        return os.path.join(self.root, name[:2], name[2:4], name)
+
+class ReadThroughCache:
+    """
+    Bounded local copies of remote content, evicting the least recently
+    used. Stored content never changes under a key, so entries are never stale.
+    The cache folder is shared by every process on the node.
+    """
+
+    def __init__(self, folder: str, max_size: int):
+        self.folder = folder
+        self.max_size = max_size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+    def _pin(self, path: str, pinned_path: str) -> bool:
+        """Give a cached entry a second, private name. False on a miss."""
+        try:
+            os.link(path, pinned_path)
+        except FileNotFoundError:
+            return False
+        except OSError:
+            # No hard links on this filesystem
+            try:
+                shutil.copyfile(path, pinned_path)
+            except FileNotFoundError:
+                return False
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path)  # Mark as recently used
+        return True
+
+    @contextlib.contextmanager
+    def use(self, key: str, fetch: Callable[[str], None]) -> Iterator[str]:
+        """
+        Local path of key's content for the duration of the block, calling
+        fetch(dest_path) to download it on a miss. The path is a private link
+        to the entry, so another process evicting the entry meanwhile doesn't
+        remove the file from under the caller.
+        """
+        path = self._path(key)
+        pinned_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            if not self._pin(path, pinned_path):
+                os.makedirs(self.folder, exist_ok=True)
+                fetch(pinned_path)
+                with contextlib.suppress(OSError):
+                    # Published under a temporary name first, so readers never see a partial entry
+                    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+                    try:
+                        os.link(pinned_path, tmp_path)
+                    except OSError:
+                        shutil.copyfile(pinned_path, tmp_path)
+                    os.replace(tmp_path, path)
+                self._evict(keep=path)
+            yield pinned_path
+        finally:
+            with contextlib.suppress(OSError):
+                os.remove(pinned_path)
+
+    def discard(self, key: str) -> None:
+        with contextlib.suppress(OSError):
+            os.remove(self._path(key))
+
+    def _evict(self, keep: str) -> None:
+        # Entries in use live on under their pinned names, which aren't counted or evicted
+        files = []
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.name.endswith(".tmp"):
+                    continue
+                with contextlib.suppress(FileNotFoundError):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_size:
+                break
+            if path == keep:
+                continue
+            with contextlib.suppress(OSError):
+                os.remove(path)
+            total -= size
+
+class S3Storage(Storage):
+    """Content in an S3-compatible bucket. Needs boto3."""
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None, access_key_id: Optional[str] = None,
+                 secret_access_key: Optional[str] = None, cache: Optional[ReadThroughCache] = None):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.cache = cache
+        self._client = None
+
+    @property
+    def client(self):
+        # Created on first use, so forked worker processes each get their own
+        if self._client is None:
+            import boto3
+            self._client = boto3.client(
+                "s3",
+                endpoint_url=self.endpoint_url,
+                region_name=self.region,
+                aws_access_key_id=self.access_key_id,
+                aws_secret_access_key=self.secret_access_key,
+            )
+        return self._client
+
+    @staticmethod
+    def _object_key(key: str) -> str:
+        # Keys of files stored locally before the switch map onto the same relative path
+        return key.replace(os.sep, "/").lstrip("/")
+
+    def _is_missing(self, error) -> bool:
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def key_for(self, name: str) -> str:
+        return f"{self.prefix}/{name}" if self.prefix else name
+
+    def normalize_key(self, key: str) -> str:
+        return self._object_key(key)
+
+    def put_file(self, local_path: str, key: str) -> None:
+        # upload_file switches to parallel multipart uploads for large files
+        self.copy_in(local_path, key)
+        os.remove(local_path)
+
+    def open(self, key: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))["Body"]
+
+    def _get_range(self, key: str, start: int, end: Optional[int]):
+        from botocore.exceptions import ClientError
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._object_key(key), Range=byte_range)["Body"]
+        except ClientError as e:
+            # Ranges past the end of the object (or of an empty one) read as empty
+            if e.response.get("Error", {}).get("Code") == "InvalidRange":
+                return None
+            raise
+
+    def read_range(self, key: str, start: int, length: int) -> bytes:
+        if length <= 0:
+            return b""
+        body = self._get_range(key, start, start + length - 1)
+        return body.read() if body is not None else b""
+
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None,
+                   chunk_size: int = None) -> Iterator[bytes]:
+        body = self._get_range(key, start, end)
+        if body is None:
+            return
+        with contextlib.closing(body):
+            yield from body.iter_chunks(chunk_size or settings.UPLOAD_CHUNK_SIZE)
+
+    def size(self, key: str) -> int:
+        return self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))["ContentLength"]
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except ClientError as e:
+            if self._is_missing(e):
+                return False
+            raise
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+        if self.cache:
+            self.cache.discard(key)
+
+    def copy_in(self, local_path: str, key: str) -> None:
+        self.client.upload_file(local_path, self.bucket, self._object_key(key))
+
+    def shards(self) -> List[str]:
+        # Object names start with a hex content hash (or a legacy uuid)
+        return list("0123456789abcdef")
+
+    def list_objects(self, shard: str) -> Iterator[StoredObject]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        prefix = f"{self.prefix}/{shard}" if self.prefix else shard
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                yield StoredObject(obj["Key"], obj["Size"], obj["LastModified"].timestamp())
+
+    @contextlib.contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        def fetch(dest_path: str) -> None:
+            self.client.download_file(self.bucket, self._object_key(key), dest_path)
+
+        if self.cache:
+            with self.cache.use(key, fetch) as path:
+                yield path
+            return
+
+        # Without a cache, download to a temporary file for the duration
+        tmp_dir = os.path.join(settings.UPLOAD_FOLDER, ".tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        tmp_path = os.path.join(tmp_dir, uuid.uuid4().hex)
+        try:
+            fetch(tmp_path)
+            yield tmp_path
+        finally:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+
+def create_storage() -> Storage:
+    """The storage backend selected by STORAGE_BACKEND."""
+    backend = settings.STORAGE_BACKEND.lower()
+    if backend == "local":
+        return LocalStorage(settings.UPLOAD_FOLDER)
+    if backend == "sharded":
+        return ShardedLocalStorage(settings.UPLOAD_FOLDER)
+    if backend == "s3":
+        if not settings.STORAGE_S3_BUCKET:
+            raise ValueError("STORAGE_S3_BUCKET must be set for the s3 storage backend")
+        cache = None
+        if settings.STORAGE_CACHE_MAX_SIZE > 0:
+            cache = ReadThroughCache(settings.STORAGE_CACHE_FOLDER, settings.STORAGE_CACHE_MAX_SIZE)
+        return S3Storage(
+            bucket=settings.STORAGE_S3_BUCKET,
+            prefix=settings.STORAGE_S3_PREFIX,
+            endpoint_url=settings.STORAGE_S3_ENDPOINT_URL,
+            region=settings.STORAGE_S3_REGION,
+            access_key_id=settings.STORAGE_S3_ACCESS_KEY_ID,
+            secret_access_key=settings.STORAGE_S3_SECRET_ACCESS_KEY,
+            cache=cache,
+        )
+    raise ValueError(f"Unknown storage backend: {settings.STORAGE_BACKEND}")
+
+storage = create_storage()
@@ -0,0 +1,107 @@
+import codecs
+import re
+from typing import Dict, Any
+from app.config import settings
+
+# Bytes inspected when guessing the encoding
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+# Byte order marks, longest first so UTF-32 isn't mistaken for UTF-16
+_BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+# Bytes that are undefined in cp1252
+_CP1252_UNDEFINED = set(b"\x81\x8d\x8f\x90\x9d")
+
+# Characters str.splitlines() treats as line boundaries
+_LINE_BREAKS = "\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029"
+
+_WORD = re.compile(r"\w+")
+_WORD_CHAR = re.compile(r"\w")
+
+def detect_encoding(file_path: str) -> str:
+    """
+    Guess a file's text encoding from its first bytes.
+    Honors byte order marks, prefers UTF-8 and falls back to cp1252, or
+    latin-1 which can decode any byte sequence.
+    """
+    with open(file_path, "rb") as f:
+        sample = f.read(ENCODING_SAMPLE_SIZE)
+
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    try:
+        # Not final, so a multi-byte character cut off by the sample size is fine
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    if _CP1252_UNDEFINED.isdisjoint(sample):
+        return "cp1252"
+    return "latin-1"
+
+def text_statistics(file_path: str, encoding: str = None, chunk_size: int = None) -> Dict[str, Any]:
+    """
+    Count lines, words and characters of a text file in a single pass.
+    The file is decoded incrementally in fixed-size chunks, so memory use
+    does not depend on the file size. Counts match str.splitlines(),
+    re.findall(r'\\w+') and len() on the fully decoded text.
+    """
+    encoding = encoding or detect_encoding(file_path)
+    chunk_size = chunk_size or settings.TEXT_CHUNK_SIZE
+    preview_length = settings.TEXT_PREVIEW_LENGTH
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+
+    char_count = 0
+    line_breaks = 0
+    word_count = 0
+    preview = ""
+    last_char = ""
+
+    with open(file_path, "rb") as f:
+        while True:
+            raw = f.read(chunk_size)
+            text = decoder.decode(raw, final=not raw)
+            if text:
+                char_count += len(text)
+                if len(preview) <= preview_length:
+                    preview += text[:preview_length + 1 - len(preview)]
+
+                # Line boundaries, not counting a \r\n split across chunks twice
+                lines = text.splitlines(keepends=True)
+                line_breaks += len(lines)
+                if lines[-1][-1] not in _LINE_BREAKS:
+                    line_breaks -= 1
+                if last_char == "\r" and text[0] == "\n":
+                    line_breaks -= 1
+
+                # Words, not counting a word split across chunks twice
+                word_count += len(_WORD.findall(text))
+                if _WORD_CHAR.match(last_char) and _WORD_CHAR.match(text[0]):
+                    word_count -= 1
+
+                last_char = text[-1]
+
+            if not raw:
+                break
+
+    # A last line without a line break still counts
+    line_count = line_breaks + (1 if last_char and last_char not in _LINE_BREAKS else 0)
+
+    return {
+        "type": "text",
+        "encoding": encoding,
+        "line_count": line_count,
+        "word_count": word_count,
+        "character_count": char_count,
+        "preview": preview[:preview_length] + "..." if len(preview) > preview_length else preview,
+        "message": "Text processing completed successfully."
+    }
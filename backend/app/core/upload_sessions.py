@@ -0,0 +1,79 @@
+import os
+import hashlib
+import aiofiles
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator
+from fastapi import HTTPException, status
+from sqlalchemy import select, delete
+from sqlalchemy.orm import Session
+from starlette.requests import ClientDisconnect
+from app.config import settings
+from app.core.uploads import StoredUpload
+from app.models.upload_session import UploadSession
+
+def partial_upload_path(session_id: str) -> str:
+    """Where the chunks of an upload session are written."""
+    return os.path.join(settings.UPLOAD_FOLDER, ".tmp", f"{session_id}.part")
+
+async def write_chunk(file_path: str, offset: int, chunks: AsyncIterator[bytes], max_size: int) -> int:
+    """
+    Stream a request body into the partial file at `offset`, without
+    spooling it first. Returns the number of bytes written; if the client
+    disconnects, that is whatever arrived, so the upload resumes from there.
+    """
+    written = 0
+    async with aiofiles.open(file_path, "r+b") as out:
+        # Drop anything past the offset, left by an earlier chunk that was never acknowledged
+        await out.truncate(offset)
+        await out.seek(offset)
+        try:
+            async for chunk in chunks:
+                if written + len(chunk) > max_size:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="Chunk goes past the size announced for this upload"
+                    )
+                await out.write(chunk)
+                written += len(chunk)
+        except ClientDisconnect:
+            pass
+    return written
+
+def hash_upload(file_path: str) -> StoredUpload:
+    """Compute size, SHA-256 and MIME sniffing header of a finished upload. Blocking."""
+    sha256 = hashlib.sha256()
+    size = 0
+    header = b""
+    with open(file_path, "rb") as f:
+        while True:
+            chunk = f.read(settings.UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            if len(header) < settings.MIME_SNIFF_BYTES:
+                header += chunk[:settings.MIME_SNIFF_BYTES - len(header)]
+            sha256.update(chunk)
+            size += len(chunk)
+    return StoredUpload(file_path=file_path, file_size=size, content_hash=sha256.hexdigest(), header=header)
+
+def expire_upload_sessions(db: Session, max_age: int) -> int:
+    """Delete upload sessions without a chunk for `max_age` seconds, and their partial files."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=max_age)
+    expired = db.execute(
+        select(UploadSession.id, UploadSession.file_path).where(UploadSession.updated_at < cutoff)
+    ).all()
+    if not expired:
+        return 0
+
+    db.execute(
+        delete(UploadSession)
+        .where(UploadSession.id.in_([row.id for row in expired]), UploadSession.updated_at < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+    for row in expired:
+        try:
+            os.remove(row.file_path)
+        except OSError:
+            pass
+    return len(expired)
@@ -0,0 +1,112 @@
+import os
+import uuid
+import hashlib
+import aiofiles
+import aiofiles.os
+from dataclasses import dataclass
+from typing import Optional
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import JSONResponse
+from app.config import settings
+
+@dataclass
+class StoredUpload:
+    """Result of streaming an upload to disk."""
+    file_path: str
+    file_size: int
+    content_hash: str
+    header: bytes  # First MIME_SNIFF_BYTES of the content
+
+def _too_large(limit: Optional[int] = None) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File too large. Maximum size is {limit or settings.MAX_CONTENT_LENGTH} bytes"
+    )
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject oversized upload requests from their Content-Length header,
+    before Starlette spools the multipart body to a temporary file.
+    """
+
+    # Allowance for multipart boundaries and part headers
+    MULTIPART_OVERHEAD = 64 * 1024
+
+    def __init__(self, app, path_prefix: str = "/api/files/upload",
+                 batch_path_prefix: str = "/api/files/upload/batch"):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.batch_path_prefix = batch_path_prefix
+
+    def _limit_for(self, path: str) -> Optional[int]:
+        # Match whole path segments: /api/files/uploads (resumable chunks) has no request limit
+        if _under(path, self.batch_path_prefix):
+            return settings.MAX_BATCH_CONTENT_LENGTH
+        if _under(path, self.path_prefix):
+            return settings.MAX_CONTENT_LENGTH
+        return None
+
+    async def __call__(self, scope, receive, send):
+        limit = self._limit_for(scope["path"]) if scope["type"] == "http" else None
+        if limit is not None:
+            content_length = _get_header(scope, b"content-length")
+            if content_length and content_length.isdigit() and \
+                    int(content_length) > limit + self.MULTIPART_OVERHEAD:
+                response = JSONResponse(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    content={"detail": _too_large(limit).detail}
+                )
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
+
+def _under(path: str, prefix: str) -> bool:
+    return path == prefix or path.startswith(prefix.rstrip("/") + "/")
+
+def _get_header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+async def save_upload_file(upload: UploadFile, file_path: str) -> StoredUpload:
+    """
+    Stream an upload to disk without blocking the event loop.
+    Size and SHA-256 are computed in the same pass, the head of the file is
+    kept for MIME sniffing, and the write is aborted as soon as the size
+    limit is exceeded.
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    header = b""
+
+    try:
+        async with aiofiles.open(file_path, "wb") as buffer:
+            while True:
+                chunk = await upload.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+
+                size += len(chunk)
+                if size > settings.MAX_CONTENT_LENGTH:
+                    raise _too_large()
+
+                if len(header) < settings.MIME_SNIFF_BYTES:
+                    header += chunk[:settings.MIME_SNIFF_BYTES - len(header)]
+
+                sha256.update(chunk)
+                await buffer.write(chunk)
+    except BaseException:
+        # Don't leave partial files behind
+        try:
+            await aiofiles.os.remove(file_path)
+        except OSError:
+            pass
+        raise
+
+    return StoredUpload(file_path=file_path, file_size=size, content_hash=sha256.hexdigest(), header=header)
+
+def new_temp_upload_path() -> str:
+    """Return a unique path in the upload staging folder."""
+    return os.path.join(settings.UPLOAD_FOLDER, ".tmp", uuid.uuid4().hex)
@@ -0,0 +1,151 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Dict, Any
+from sqlalchemy import DateTime
+from app.config import settings
+from app.models.user import User
+
+# Columns kept in the cache; password hashes never leave the database and
+# the file counter changes with every upload
+UNCACHED_COLUMNS = {"hashed_password", "file_count"}
+CACHED_COLUMNS = [column.key for column in User.__table__.columns if column.key not in UNCACHED_COLUMNS]
+DATETIME_COLUMNS = {column.key for column in User.__table__.columns if isinstance(column.type, DateTime)}
+
+logger = logging.getLogger("app.core.user_cache")
+
+class MemoryBackend:
+    """Per-process LRU with a TTL on every entry."""
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self.evictions = 0
+
+    async def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(user_id)
+        if entry is None:
+            return None
+
+        expires_at, data = entry
+        if expires_at < time.monotonic():
+            del self.entries[user_id]
+            return None
+
+        self.entries.move_to_end(user_id)
+        return data
+
+    async def set(self, user_id: int, data: Dict[str, Any]) -> None:
+        self.entries[user_id] = (time.monotonic() + self.ttl, data)
+        self.entries.move_to_end(user_id)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, user_id: int) -> None:
+        self.entries.pop(user_id, None)
+
+class RedisBackend:
+    """
+    Shared cache so every API worker sees the same entries and invalidations.
+    Redis being down only costs the cache: lookups miss and fall through to
+    the database instead of failing the request.
+    """
+
+    def __init__(self, url: str, ttl: int):
+        import redis.asyncio as redis
+        from redis.exceptions import RedisError
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.RedisError = RedisError
+        self.errors = 0
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"user:{user_id}"
+
+    def _failed(self, operation: str, user_id: int, error: Exception) -> None:
+        self.errors += 1
+        logger.warning("User cache %s for user %d failed: %s", operation, user_id, error)
+
+    async def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        try:
+            raw = await self.client.get(self._key(user_id))
+        except self.RedisError as e:
+            self._failed("get", user_id, e)
+            return None
+        if raw is None:
+            return None
+
+        data = json.loads(raw)
+        for key in DATETIME_COLUMNS:
+            if data.get(key):
+                data[key] = datetime.fromisoformat(data[key])
+        return data
+
+    async def set(self, user_id: int, data: Dict[str, Any]) -> None:
+        try:
+            await self.client.set(self._key(user_id), json.dumps(data, default=datetime.isoformat), ex=self.ttl)
+        except self.RedisError as e:
+            self._failed("set", user_id, e)
+
+    async def delete(self, user_id: int) -> None:
+        # A failed invalidation leaves the old entry to expire with its TTL
+        try:
+            await self.client.delete(self._key(user_id))
+        except self.RedisError as e:
+            self._failed("delete", user_id, e)
+
+class UserCache:
+    """
+    Cache of authenticated user principals, keyed by user id.
+    Entries are column snapshots; get() returns a detached User built from
+    them, so handlers that modify a user must load it from their session.
+    """
+
+    def __init__(self):
+        if settings.USER_CACHE_REDIS_URL:
+            self.backend = RedisBackend(settings.USER_CACHE_REDIS_URL, settings.USER_CACHE_TTL)
+        else:
+            self.backend = MemoryBackend(settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TTL)
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, user_id: int) -> Optional[User]:
+        if not settings.USER_CACHE_ENABLED:
+            return None
+
+        data = await self.backend.get(user_id)
+        if data is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return User(**data)
+
+    async def set(self, user: User) -> None:
+        if settings.USER_CACHE_ENABLED:
+            await self.backend.set(user.id, {key: getattr(user, key) for key in CACHED_COLUMNS})
+
+    async def invalidate(self, user_id: int) -> None:
+        await self.backend.delete(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        stats = {
+            "backend": "redis" if isinstance(self.backend, RedisBackend) else "memory",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+        if isinstance(self.backend, MemoryBackend):
+            stats["size"] = len(self.backend.entries)
+            stats["evictions"] = self.backend.evictions
+        else:
+            stats["errors"] = self.backend.errors
+        return stats
+
+user_cache = UserCache()
@@ -1,24 +1,171 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import URL, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from app.config import settings
+from app.models.types import json_dumps, json_loads
 
-# Create MS SQL Server connection string with Windows Authentication
-SQLALCHEMY_DATABASE_URL = f"mssql+pyodbc://{settings.DB_HOST}/{settings.DB_NAME}?driver={settings.DB_DRIVER}&trusted_connection=yes"
+def get_database_url() -> URL:
+    """Build the connection URL for the configured database backend."""
+    if settings.DATABASE_URL:
+        return make_url(settings.DATABASE_URL)
 
-# Create SQLAlchemy engine
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    if settings.DB_BACKEND == "sqlite":
+        return URL.create("sqlite", database=settings.SQLITE_PATH)
+
+    if settings.DB_BACKEND == "postgresql":
+        return URL.create(
+            "postgresql+psycopg2",
+            username=settings.DB_USER,
+            password=settings.DB_PASSWORD,
+            host=settings.DB_HOST,
+            port=settings.DB_PORT,
+            database=settings.DB_NAME
+        )
+
+    # MS SQL Server, with Windows Authentication unless disabled
+    query = {"driver": settings.DB_DRIVER.replace("+", " ")}
+    if settings.DB_TRUSTED_CONNECTION:
+        query["trusted_connection"] = "yes"
+        credentials = {}
+    else:
+        credentials = {"username": settings.DB_USER, "password": settings.DB_PASSWORD}
+    return URL.create(
+        "mssql+pyodbc",
+        host=settings.DB_HOST,
+        port=settings.DB_PORT,
+        database=settings.DB_NAME,
+        query=query,
+        **credentials
+    )
+
+class PoolMetrics:
+    """Connection checkout counters for monitoring."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def record(self, wait_time: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_time_avg_ms": self.wait_time_total / attempts * 1000 if attempts else 0.0,
+                "wait_time_max_ms": self.wait_time_max * 1000,
+            }
+
+class MeteredPoolMixin:
+    """Records how long callers wait for a connection from the pool."""
+
+    metrics: PoolMetrics
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - start)
+        return connection
+
+class MeteredQueuePool(MeteredPoolMixin, QueuePool):
+    metrics = PoolMetrics()
+
+class MeteredAsyncQueuePool(MeteredPoolMixin, AsyncAdaptedQueuePool):
+    metrics = PoolMetrics()
+
+# Async drivers used by the API for each sync driver
+ASYNC_DRIVERS = {
+    "mssql": "mssql+aioodbc",
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def get_async_database_url(url: URL) -> URL:
+    """Swap the driver of a connection URL for its asyncio counterpart."""
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+def get_engine_options(url: URL, poolclass=MeteredQueuePool) -> dict:
+    """Pool and driver options for the given backend."""
+    options = {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+    if url.get_backend_name() == "sqlite":
+        # Sessions may be used from FastAPI's thread pool
+        options["connect_args"] = {"check_same_thread": False}
+    elif url.get_backend_name() == "postgresql":
+        # JSONB columns are encoded by the driver
+        options["json_serializer"] = json_dumps
+        options["json_deserializer"] = json_loads
+    elif url.get_backend_name() == "mssql" and url.get_driver_name() in ("pyodbc", "aioodbc"):
+        options["fast_executemany"] = settings.DB_FAST_EXECUTEMANY
+
+    return options
+
+SQLALCHEMY_DATABASE_URL = get_database_url()
+ASYNC_DATABASE_URL = get_async_database_url(SQLALCHEMY_DATABASE_URL)
+
+# Create SQLAlchemy engine, used by the processing worker and for schema creation
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **get_engine_options(SQLALCHEMY_DATABASE_URL))
+
+# Create async engine, used by the API so queries don't block the event loop
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **get_engine_options(ASYNC_DATABASE_URL, poolclass=MeteredAsyncQueuePool)
+)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Objects stay usable after commit, since lazy refreshes aren't possible with asyncio
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create Base class for database models
 Base = declarative_base()
 
+def _pool_status(pool, metrics: PoolMetrics) -> dict:
+    return {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        **metrics.snapshot(),
+    }
+
+def get_pool_status() -> dict:
+    """Current pool usage plus checkout metrics, for monitoring."""
+    return {
+        "backend": SQLALCHEMY_DATABASE_URL.get_backend_name(),
+        "async": _pool_status(async_engine.pool, MeteredAsyncQueuePool.metrics),
+        "sync": _pool_status(engine.pool, MeteredQueuePool.metrics),
+    }
+
 # Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
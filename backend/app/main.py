@@ -1,7 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import auth, files, users
+from app.api import auth, files, users, metrics
 from app.database import engine, Base
+from app.core.uploads import UploadSizeLimitMiddleware
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -17,10 +18,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized uploads before the body is read
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(files.router, prefix="/api/files", tags=["files"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["metrics"])
 
 @app.get("/")
 async def root():
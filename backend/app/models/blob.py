@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+class Blob(Base):
+    """Stored file content shared by every upload with the same SHA-256."""
+    __tablename__ = "blobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), unique=True, index=True, nullable=False)  # SHA-256 hex digest
+    file_path = Column(String(500), nullable=False)
+    file_size = Column(BigInteger, nullable=False)  # Size in bytes, resumable uploads can pass 2 GiB
+    ref_count = Column(Integer, nullable=False, default=0)  # Number of File rows using this blob
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
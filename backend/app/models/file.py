@@ -1,8 +1,11 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Enum, Index
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
 import enum
 from app.database import Base
+from app.models.types import JSONType
 
 class ProcessingStatus(str, enum.Enum):
     PENDING = "pending"
@@ -10,6 +13,16 @@ class ProcessingStatus(str, enum.Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
+# SQLite stores CURRENT_TIMESTAMP without fractional seconds; binding datetimes
+# in the same format keeps equality comparisons (used by keyset pagination) exact
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite"
+)
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
 class File(Base):
     __tablename__ = "files"
 
@@ -17,15 +30,33 @@ class File(Base):
     filename = Column(String(255), nullable=False)
     original_filename = Column(String, nullable=False)
     file_path = Column(String(500), nullable=False)
-    file_size = Column(Integer, nullable=False)  # Size in bytes
-    file_type = Column(String(255), nullable=False)  # MIME type
+    file_size = Column(BigInteger, nullable=False)  # Size in bytes, resumable uploads can pass 2 GiB
+    file_type = Column(String(255), nullable=False)  # MIME type reported by the client
+    mime_type = Column(String(255), nullable=True)  # MIME type detected from the content
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 hex digest
     status = Column(Enum(ProcessingStatus), default=ProcessingStatus.PENDING)
-    processing_result = Column(Text, nullable=True)  # JSON string with processing results
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    processing_result = Column(JSONType, nullable=True)  # Parsed processing results
+    processing_attempts = Column(Integer, nullable=False, default=0)  # Times claimed by a worker
+    parser_version = Column(String(32), nullable=True)  # PARSER_VERSION that produced processing_result
+    created_at = Column(Timestamp, server_default=func.now())
+    # Set in Python: SQLite's CURRENT_TIMESTAMP has whole seconds, and (updated_at, status)
+    # must change with every write because it versions cached results and ETags
+    updated_at = Column(DateTime(timezone=True), onupdate=utc_now)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # Last sign of life from the worker processing it
     
     # Foreign keys
     owner_id = Column(Integer, ForeignKey("users.id"))
     
     # Relationships
-    owner = relationship("User", back_populates="files")
\ No newline at end of file
+    owner = relationship("User", back_populates="files")
+
+    # Read server-generated timestamps back in the INSERT itself, so bulk
+    # inserts don't need a refresh per row
+    __mapper_args__ = {"eager_defaults": True}
+
+    __table_args__ = (
+        # Keyset pagination of a user's files, optionally filtered or sorted by status / type
+        Index("ix_files_owner_created_id", "owner_id", "created_at", "id"),
+        Index("ix_files_owner_status_created_id", "owner_id", "status", "created_at", "id"),
+        Index("ix_files_owner_type_created_id", "owner_id", "file_type", "created_at", "id"),
+    )
\ No newline at end of file
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+class ReprocessRequest(Base):
+    """A reprocess request made with an Idempotency-Key, replayed when the key is sent again."""
+    __tablename__ = "reprocess_requests"
+
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    idempotency_key = Column(String(255), nullable=False)
+    file_id = Column(Integer, nullable=False)  # Not a foreign key: deleting the file keeps the key until it expires
+    outcome = Column(String(32), nullable=False)  # ReprocessOutcome of the original request
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    __table_args__ = (
+        UniqueConstraint("owner_id", "idempotency_key", name="uq_reprocess_requests_owner_key"),
+    )
@@ -0,0 +1,48 @@
+import json
+from typing import Any
+import orjson
+from sqlalchemy import Text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import TypeDecorator
+
+# Numpy scalars and non-string keys show up in pandas-derived results
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def json_dumps(value: Any) -> str:
+    """Serialize a value to a JSON string with orjson."""
+    return orjson.dumps(value, option=ORJSON_OPTIONS).decode("utf-8")
+
+def json_loads(raw: Any) -> Any:
+    """Parse JSON with orjson. Legacy rows may contain NaN/Infinity, which become null."""
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return json.loads(raw, parse_constant=lambda constant: None)
+
+class JSONType(TypeDecorator):
+    """
+    JSON document column: native JSONB on PostgreSQL, text elsewhere
+    (SQL Server and SQLite have no JSON column type). Values are always
+    Python objects on the application side.
+    """
+    impl = Text
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.JSONB(none_as_null=True))
+        return dialect.type_descriptor(Text())
+
+    def process_bind_param(self, value, dialect):
+        # JSONB is encoded by the driver, using the engine's json_serializer
+        if value is None or dialect.name == "postgresql":
+            return value
+        return json_dumps(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None or dialect.name == "postgresql":
+            return value
+        try:
+            return json_loads(value)
+        except ValueError:
+            return {"error": "Invalid JSON in processing result"}
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+class UploadSession(Base):
+    """A resumable upload in progress: chunks are appended to file_path until it is complete."""
+    __tablename__ = "upload_sessions"
+
+    id = Column(String(32), primary_key=True)  # Random hex token, also names the partial file
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    original_filename = Column(String(255), nullable=False)
+    file_type = Column(String(255), nullable=False)  # MIME type reported by the client
+    file_path = Column(String(500), nullable=False)  # Partial file in the upload staging folder
+    total_size = Column(BigInteger, nullable=False)  # Size announced by the client, in bytes
+    received_size = Column(BigInteger, nullable=False, default=0)  # Bytes written so far, the next chunk's offset
+    expected_hash = Column(String(64), nullable=True)  # SHA-256 hex digest announced by the client
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
@@ -16,6 +16,7 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     google_id = Column(String(255), unique=True, nullable=True)  # Changed from VARCHAR(max)
     profile_picture = Column(String(500), nullable=True) 
+    file_count = Column(Integer, nullable=True, default=0)  # Maintained by uploads and deletes; NULL until backfilled
 
     # Relationships
     files = relationship("File", back_populates="owner")
\ No newline at end of file
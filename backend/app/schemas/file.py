@@ -15,14 +15,16 @@ class FileCreate(FileBase):
 
 class FileUpdate(BaseModel):
     status: Optional[ProcessingStatus] = None
-    processing_result: Optional[str] = None
+    processing_result: Optional[Dict[str, Any]] = None
 
 class FileInDB(FileBase):
     id: int
     owner_id: int
     file_path: str
+    content_hash: Optional[str] = None
+    mime_type: Optional[str] = None
     status: ProcessingStatus
-    processing_result: Optional[str] = None
+    processing_result: Optional[Dict[str, Any]] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
     
@@ -31,6 +33,7 @@ class FileInDB(FileBase):
 
 class File(FileBase):
     id: int
+    mime_type: Optional[str] = None
     status: ProcessingStatus
     processing_result: Optional[Dict[str, Any]] = None
     created_at: datetime
@@ -39,6 +42,49 @@ class File(FileBase):
     class Config:
         orm_mode = True
 
+class BatchUploadItem(BaseModel):
+    """Outcome of one file in a batch upload: either file or error is set."""
+    original_filename: str
+    status_code: int
+    file: Optional[File] = None
+    error: Optional[str] = None
+
+class BatchUploadResult(BaseModel):
+    created: int
+    failed: int
+    files: List[BatchUploadItem]
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    file_size: int
+    file_type: Optional[str] = None
+    sha256: Optional[str] = None  # Hex digest checked when the upload is completed
+
+class UploadSession(BaseModel):
+    """Progress of a resumable upload; the next chunk goes at offset received_size."""
+    id: str
+    original_filename: str
+    total_size: int
+    received_size: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class FileListItem(BaseModel):
+    """File summary for listings; the processing result is only served by GET /files/{id}."""
+    id: int
+    filename: Optional[str] = None
+    original_filename: Optional[str] = None
+    file_type: Optional[str] = None
+    mime_type: Optional[str] = None
+    file_size: Optional[int] = None
+    status: Optional[ProcessingStatus] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
 class FileList(BaseModel):
-    total: int
-    files: List[File]
\ No newline at end of file
+    total: Optional[int] = None  # None when include_total=false
+    files: List[FileListItem]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to fetch the next page; None on the last page
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""
+Remove stored content that no database row refers to.
+
+Orphans are left behind by crashed uploads, deletes in delete_file that
+failed after commit, and interrupted migrations. The collector lists storage
+one shard at a time, several shards in parallel, checks each batch of keys
+against the blobs and files tables, and deletes what is unreferenced and
+older than --min-age. Finished shards are recorded in --state-file, so an
+interrupted run continues where it stopped, and --rate caps the objects
+examined per second so production I/O isn't starved. Run with:
+
+    python -m app.tools.gc_uploads [--dry-run] [--workers 4] [--rate 500] [--min-age 3600]
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import List, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import user  # noqa: F401  Registers User, which File.owner refers to by name
+from app.models.blob import Blob
+from app.models.file import File
+from app.models.upload_session import UploadSession
+from app.core.storage import StoredObject, storage
+from app.utils.helpers import RateLimiter
+
+logger = logging.getLogger("app.tools.gc_uploads")
+
+# Content-addressed names are "<sha256>.<generation>"; older uploads are "<uuid>.<ext>"
+HASHED_NAME = re.compile(r"^([0-9a-f]{64})\.[0-9a-f]+$")
+
+# Names checked against the database per query
+BATCH_SIZE = 500
+
+@dataclass
+class Stats:
+    examined: int = 0
+    deleted: int = 0
+    deleted_bytes: int = 0
+
+    def add(self, other: "Stats") -> None:
+        self.examined += other.examined
+        self.deleted += other.deleted
+        self.deleted_bytes += other.deleted_bytes
+
+def base_name(key: str) -> str:
+    return key.replace("\\", "/").rsplit("/", 1)[-1]
+
+def referenced_keys(db: Session, objects: List[StoredObject]) -> Set[str]:
+    """
+    The normalized keys of the objects some row still points at. Rows are
+    looked up by the objects' names, then compared by full key: a second
+    copy of referenced content under another key, like the flat original
+    that migrate_uploads --keep-source leaves behind, is an orphan.
+    """
+    names = {base_name(obj.key) for obj in objects}
+    hashes = {match.group(1) for match in map(HASHED_NAME.match, names) if match}
+    legacy = [name for name in names if not HASHED_NAME.match(name)]
+
+    paths: List[str] = []
+    if hashes:
+        paths += db.scalars(select(Blob.file_path).where(Blob.content_hash.in_(hashes))).all()
+        paths += db.scalars(select(File.file_path).where(File.content_hash.in_(hashes))).all()
+    if legacy:
+        paths += db.scalars(select(File.file_path).where(File.filename.in_(legacy))).all()
+    return {storage.normalize_key(path) for path in paths}
+
+def collect_batch(db: Session, batch: List[StoredObject], dry_run: bool) -> Stats:
+    stats = Stats(examined=len(batch))
+    referenced = referenced_keys(db, batch)
+    for obj in batch:
+        if storage.normalize_key(obj.key) in referenced:
+            continue
+        logger.info("%s orphan %s (%d bytes)", "Would delete" if dry_run else "Deleting", obj.key, obj.size)
+        if not dry_run:
+            storage.delete(obj.key)
+        stats.deleted += 1
+        stats.deleted_bytes += obj.size
+    return stats
+
+def collect_shard(shard: str, min_age: float, limiter: RateLimiter, dry_run: bool) -> Stats:
+    """Delete the orphans in one shard of storage."""
+    stats = Stats()
+    cutoff = time.time() - min_age
+    batch: List[StoredObject] = []
+    with SessionLocal() as db:
+        for obj in storage.list_objects(shard):
+            limiter.wait()
+            # Content is written to storage shortly before its row is committed
+            if obj.modified > cutoff:
+                stats.examined += 1
+                continue
+            batch.append(obj)
+            if len(batch) >= BATCH_SIZE:
+                stats.add(collect_batch(db, batch, dry_run))
+                batch = []
+        if batch:
+            stats.add(collect_batch(db, batch, dry_run))
+    return stats
+
+def collect_staging(min_age: float, dry_run: bool) -> Stats:
+    """
+    Delete abandoned files in the local staging folder: uploads that never
+    reached storage, and resumable upload parts whose session is gone.
+    Parts of live sessions are left to the worker, which expires them.
+    """
+    stats = Stats()
+    staging = os.path.join(settings.UPLOAD_FOLDER, ".tmp")
+    cutoff = time.time() - min_age
+    try:
+        with os.scandir(staging) as entries:
+            candidates = [entry for entry in entries if entry.is_file(follow_symlinks=False)]
+    except FileNotFoundError:
+        return stats
+
+    with SessionLocal() as db:
+        session_ids = set(db.scalars(select(UploadSession.id)).all())
+    for entry in candidates:
+        stats.examined += 1
+        stat = entry.stat(follow_symlinks=False)
+        if stat.st_mtime > cutoff:
+            continue
+        if entry.name.endswith(".part") and entry.name[:-len(".part")] in session_ids:
+            continue
+        logger.info("%s abandoned upload %s", "Would delete" if dry_run else "Deleting", entry.path)
+        if not dry_run:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+        stats.deleted += 1
+        stats.deleted_bytes += stat.st_size
+    return stats
+
+def load_state(path: str) -> Set[str]:
+    try:
+        with open(path) as f:
+            return set(json.load(f)["done"])
+    except FileNotFoundError:
+        return set()
+
+def save_state(path: str, done: Set[str]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"done": sorted(done)}, f)
+    os.replace(tmp_path, path)
+
+def collect(workers: int, rate: float, min_age: float, state_file: str, dry_run: bool = False) -> Stats:
+    limiter = RateLimiter(rate)
+    done = load_state(state_file)
+    shards = [shard for shard in storage.shards() if shard not in done]
+    if done:
+        logger.info("Resuming, %d shards done, %d left", len(done), len(shards))
+
+    total = collect_staging(min_age, dry_run)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(collect_shard, shard, min_age, limiter, dry_run): shard for shard in shards}
+        for future in as_completed(futures):
+            shard = futures[future]
+            stats = future.result()
+            total.add(stats)
+            done.add(shard)
+            if not dry_run:
+                save_state(state_file, done)
+            logger.info("Shard %r: examined %d, deleted %d", shard or "/", stats.examined, stats.deleted)
+
+    # A complete pass; the next run starts from scratch
+    if not dry_run and os.path.exists(state_file):
+        os.remove(state_file)
+
+    logger.info(
+        "%s %d of %d objects (%d bytes)",
+        "Would delete" if dry_run else "Deleted", total.deleted, total.examined, total.deleted_bytes
+    )
+    return total
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="Shards collected in parallel")
+    parser.add_argument("--rate", type=float, default=500, help="Objects examined per second, 0 for no limit")
+    parser.add_argument("--min-age", type=float, default=3600,
+                        help="Seconds an object must exist before it can be deleted")
+    parser.add_argument("--state-file", default=os.path.join(settings.UPLOAD_FOLDER, ".gc-state.json"),
+                        help="Progress of an interrupted run")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
+    args = parser.parse_args()
+    collect(args.workers, args.rate, args.min_age, args.state_file, dry_run=args.dry_run)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    main()
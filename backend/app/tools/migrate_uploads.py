@@ -0,0 +1,127 @@
+"""
+Move stored content into the layout of the configured storage backend.
+
+Files uploaded before STORAGE_BACKEND=sharded sit directly in UPLOAD_FOLDER.
+Each is copied to the key the current backend gives it (a hard link on the
+same disk, an upload for S3), the blobs and files rows are repointed, and
+only then is the old copy removed. Safe to interrupt and run again. Run with:
+
+    python -m app.tools.migrate_uploads [--dry-run] [--batch-size 500] [--rate 200]
+"""
+import argparse
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import user  # noqa: F401  Registers User, which File.owner refers to by name
+from app.models.blob import Blob
+from app.models.file import File
+from app.core.storage import storage
+from app.utils.helpers import RateLimiter
+
+logger = logging.getLogger("app.tools.migrate_uploads")
+
+@dataclass
+class Move:
+    new_key: str
+    content_hash: Optional[str]
+    file_ids: List[int] = field(default_factory=list)
+
+def repoint(db: Session, moves: Dict[str, Move]) -> int:
+    """
+    Point every row using an old key at its new one, looking rows up by
+    the indexed content hash (or by id for files that predate hashing).
+    Returns the number of files updated.
+    """
+    updated = 0
+    for old_key, move in moves.items():
+        if move.content_hash:
+            db.execute(
+                update(Blob).where(Blob.content_hash == move.content_hash, Blob.file_path == old_key)
+                .values(file_path=move.new_key).execution_options(synchronize_session=False)
+            )
+            condition = File.content_hash == move.content_hash
+        else:
+            condition = File.id.in_(move.file_ids)
+        updated += db.execute(
+            update(File).where(condition, File.file_path == old_key)
+            .values(file_path=move.new_key).execution_options(synchronize_session=False)
+        ).rowcount
+    db.commit()
+    return updated
+
+def migrate(batch_size: int, rate: float, dry_run: bool = False, keep_source: bool = False) -> None:
+    limiter = RateLimiter(rate)
+    moved = missing = 0
+    last_id = 0
+
+    with SessionLocal() as db:
+        while True:
+            rows = db.execute(
+                select(File.id, File.file_path, File.content_hash)
+                .where(File.id > last_id).order_by(File.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            moves: Dict[str, Move] = {}
+            for row in rows:
+                if row.file_path in moves:
+                    moves[row.file_path].file_ids.append(row.id)
+                    continue
+                new_key = storage.key_for(os.path.basename(row.file_path))
+                if new_key == row.file_path:
+                    continue
+                limiter.wait()
+
+                if os.path.isfile(row.file_path):
+                    if not dry_run:
+                        storage.copy_in(row.file_path, new_key)
+                elif not storage.exists(new_key):
+                    # Neither copy exists, nothing to move
+                    logger.warning("File %d: %s is missing", row.id, row.file_path)
+                    missing += 1
+                    continue
+                # Otherwise an interrupted run already copied it
+                moves[row.file_path] = Move(new_key, row.content_hash, [row.id])
+
+            if dry_run:
+                moved += len(moves)
+                continue
+
+            repoint(db, moves)
+            if not keep_source:
+                for old_key in moves:
+                    try:
+                        os.remove(old_key)
+                    except FileNotFoundError:
+                        pass
+                # An upload that read the old key just before the repoint may have committed since
+                stragglers = repoint(db, moves)
+                if stragglers:
+                    logger.info("Repointed %d files created during the move", stragglers)
+
+            moved += len(moves)
+            logger.info("Moved %d files so far (up to file %d)", moved, last_id)
+
+    logger.info("%s %d files, %d missing", "Would move" if dry_run else "Moved", moved, missing)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500, help="Files rows per transaction")
+    parser.add_argument("--rate", type=float, default=200, help="Files moved per second, 0 for no limit")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be moved")
+    parser.add_argument("--keep-source", action="store_true",
+                        help="Leave the old copies in place, for gc_uploads to remove later")
+    args = parser.parse_args()
+    migrate(args.batch_size, args.rate, dry_run=args.dry_run, keep_source=args.keep_source)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    main()
@@ -4,6 +4,8 @@ from typing import List, Optional
 import random
 import string
 import re
+import threading
+import time
 
 def get_random_string(length: int = 8) -> str:
     """Generate a random string of fixed length."""
@@ -15,19 +17,39 @@ def clean_directory(directory: str) -> bool:
     if not os.path.exists(directory):
         return False
     
-    for filename in os.listdir(directory):
-        file_path = os.path.join(directory, filename)
-        try:
-            if os.path.isfile(file_path) or os.path.islink(file_path):
-                os.unlink(file_path)
-            elif os.path.isdir(file_path):
-                shutil.rmtree(file_path)
-        except Exception as e:
-            print(f"Failed to delete {file_path}. Reason: {e}")
-            return False
+    # scandir reports entry types from the directory listing itself, so
+    # nothing needs a stat() call before it is removed
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+            except Exception as e:
+                print(f"Failed to delete {entry.path}. Reason: {e}")
+                return False
     
     return True
 
+class RateLimiter:
+    """Spread calls out to at most `rate` per second, across threads. A rate of 0 means no limit."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
 def is_valid_username(username: str) -> bool:
     """
     Check if a username is valid.
@@ -0,0 +1,120 @@
+"""
+File processing worker.
+
+Claims PENDING rows from the files table and parses them in a process pool,
+independently of the web process. Run with:
+
+    python -m app.worker
+"""
+import logging
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, Future, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict
+
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.models import user  # noqa: F401  Registers User, which File.owner refers to by name
+from app.core.file_parser import FileParser
+from app.core.upload_sessions import expire_upload_sessions
+from app.core.reprocessing import expire_reprocess_requests
+from app.core.processing import (
+    claim_pending_files,
+    heartbeat,
+    requeue_orphaned_files,
+    release_files
+)
+
+logger = logging.getLogger("app.worker")
+
+def _init_process():
+    """Drop connections and signal handlers inherited from the parent process."""
+    engine.dispose(close=False)
+    # Shutdown is the parent's job: it lets running jobs finish, then stops the pool
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+class Worker:
+    """Polls the database for pending files and feeds them to a process pool."""
+
+    def __init__(self, concurrency: int = None, poll_interval: float = None):
+        self.concurrency = concurrency or settings.WORKER_CONCURRENCY
+        self.poll_interval = poll_interval or settings.WORKER_POLL_INTERVAL
+        self.in_flight: Dict[Future, int] = {}
+        self.stopping = False
+        self._last_maintenance = 0.0
+
+    def stop(self, *args):
+        logger.info("Shutting down, waiting for %d running jobs", len(self.in_flight))
+        self.stopping = True
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.concurrency, initializer=_init_process)
+
+    def _maintenance(self):
+        """Heartbeat running jobs, recover orphans, drop abandoned uploads and old idempotency keys, at most every poll interval."""
+        now = time.monotonic()
+        if now - self._last_maintenance < self.poll_interval:
+            return
+        self._last_maintenance = now
+
+        with SessionLocal() as db:
+            heartbeat(db, self.in_flight.values())
+            recovered = requeue_orphaned_files(
+                db, settings.WORKER_STALE_AFTER, settings.WORKER_MAX_ATTEMPTS
+            )
+            expired = expire_upload_sessions(db, settings.UPLOAD_SESSION_EXPIRE)
+            expire_reprocess_requests(db, settings.REPROCESS_KEY_EXPIRE)
+        if recovered:
+            logger.warning("Recovered %d orphaned files", recovered)
+        if expired:
+            logger.info("Dropped %d abandoned upload sessions", expired)
+
+    def _reap(self) -> bool:
+        """Collect finished jobs. Returns False if the pool is broken."""
+        healthy = True
+        for future in [f for f in self.in_flight if f.done()]:
+            file_id = self.in_flight.pop(future)
+            try:
+                future.result()
+            except BrokenProcessPool:
+                healthy = False
+                with SessionLocal() as db:
+                    release_files(db, [file_id], settings.WORKER_MAX_ATTEMPTS)
+            except Exception:
+                logger.exception("Processing file %d failed", file_id)
+        return healthy
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        logger.info("Starting worker with concurrency %d", self.concurrency)
+
+        pool = self._new_pool()
+        try:
+            while not self.stopping:
+                if not self._reap():
+                    logger.error("Worker process crashed, restarting pool")
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self._new_pool()
+
+                self._maintenance()
+
+                free = self.concurrency - len(self.in_flight)
+                if free > 0:
+                    with SessionLocal() as db:
+                        for file_id in claim_pending_files(db, free):
+                            self.in_flight[pool.submit(FileParser.process_file, file_id)] = file_id
+
+                if self.in_flight:
+                    wait(self.in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                else:
+                    time.sleep(self.poll_interval)
+        finally:
+            pool.shutdown(wait=True)
+            self._reap()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    Worker().run()
@@ -0,0 +1,90 @@
+"""
+Concurrent load benchmark for a running API instance.
+
+Logs in (registering the user first if needed), then issues GET requests
+against one endpoint from many concurrent clients and reports throughput
+and latency percentiles. Requires httpx.
+
+    python -m benchmarks.load_api --base-url http://localhost:8000 \\
+        --path /api/files/ --concurrency 50 --requests 2000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import httpx
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def report(label: str, latencies: List[float], errors: int, elapsed: float) -> None:
+    if not latencies:
+        print(f"{label}: no successful requests, {errors} errors")
+        return
+    print(
+        f"{label}: {len(latencies)} ok, {errors} errors, {len(latencies) / elapsed:.1f} req/s, "
+        f"p50 {percentile(latencies, 50) * 1000:.1f} ms, "
+        f"p95 {percentile(latencies, 95) * 1000:.1f} ms, "
+        f"p99 {percentile(latencies, 99) * 1000:.1f} ms, "
+        f"mean {statistics.mean(latencies) * 1000:.1f} ms"
+    )
+
+async def get_token(client: httpx.AsyncClient, username: str, password: str) -> str:
+    """Log in, registering the benchmark user on first use."""
+    await client.post("/api/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "password": password,
+        "confirm_password": password,
+    })
+    response = await client.post("/api/auth/login", data={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+async def hammer(client: httpx.AsyncClient, path: str, headers: dict, count: int,
+                 latencies: List[float], errors: List[int]) -> None:
+    """One client issuing `count` sequential requests."""
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            response = await client.get(path, headers=headers)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(1)
+
+async def run(args) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        token = await get_token(client, args.username, args.password)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        latencies: List[float] = []
+        errors: List[int] = []
+        per_client = max(1, args.requests // args.concurrency)
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            hammer(client, args.path, headers, per_client, latencies, errors)
+            for _ in range(args.concurrency)
+        ])
+        report(f"GET {args.path}", latencies, len(errors), time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/files/")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--username", default="loadtest")
+    parser.add_argument("--password", default="loadtest-password")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Latency of a cheap authenticated endpoint while the API is flooded with logins.
+
+Polls GET /api/files/ from a few clients while many other clients log in
+in a loop, then reports latency percentiles for both. Requires httpx.
+
+    python -m benchmarks.login_storm --base-url http://localhost:8000 \\
+        --login-clients 50 --poll-clients 5 --duration 20
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+import httpx
+
+from benchmarks.load_api import get_token, report
+
+async def loop_requests(send, deadline: float, latencies: List[float], errors: List[int]) -> None:
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            ok = (await send()).status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(1)
+
+async def run(args) -> None:
+    limits = httpx.Limits(max_connections=args.login_clients + args.poll_clients)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        token = await get_token(client, args.username, args.password)
+        headers = {"Authorization": f"Bearer {token}"}
+        credentials = {"username": args.username, "password": args.password}
+
+        poll_latencies: List[float] = []
+        poll_errors: List[int] = []
+        login_latencies: List[float] = []
+        login_errors: List[int] = []
+
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(
+            *[
+                loop_requests(lambda: client.get("/api/files/", headers=headers),
+                              deadline, poll_latencies, poll_errors)
+                for _ in range(args.poll_clients)
+            ],
+            *[
+                loop_requests(lambda: client.post("/api/auth/login", data=credentials),
+                              deadline, login_latencies, login_errors)
+                for _ in range(args.login_clients)
+            ],
+        )
+        elapsed = time.perf_counter() - start
+        report("GET /api/files/", poll_latencies, len(poll_errors), elapsed)
+        report("POST /api/auth/login", login_latencies, len(login_errors), elapsed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--login-clients", type=int, default=50)
+    parser.add_argument("--poll-clients", type=int, default=5)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--username", default="loadtest")
+    parser.add_argument("--password", default="loadtest-password")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
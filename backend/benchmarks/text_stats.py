@@ -0,0 +1,108 @@
+"""
+Benchmark plain-text statistics: the previous read-everything implementation
+against the streaming one in app.core.text_stats.
+
+Each run happens in its own subprocess so peak RSS can be reported.
+
+    python -m benchmarks.text_stats                 # 1MB, 100MB and 1GB
+    python -m benchmarks.text_stats --sizes 1M,10M
+"""
+import argparse
+import json
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+WORDS = ["anime", "portal", "café", "naïve", "ラーメン", "x", "2024", "end-of-line"]
+
+def legacy_statistics(file_path: str) -> dict:
+    """The implementation FileParser._process_text used before streaming."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    return {
+        "line_count": len(text.splitlines()),
+        "word_count": len(re.findall(r"\w+", text)),
+        "character_count": len(text),
+    }
+
+def streaming_statistics(file_path: str) -> dict:
+    from app.core.text_stats import text_statistics
+    result = text_statistics(file_path)
+    return {key: result[key] for key in ("line_count", "word_count", "character_count")}
+
+IMPLEMENTATIONS = {"legacy": legacy_statistics, "streaming": streaming_statistics}
+
+def parse_size(value: str) -> int:
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    value = value.strip().upper()
+    if value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+def generate_file(path: str, size: int) -> None:
+    """Write roughly `size` bytes of random UTF-8 text."""
+    rng = random.Random(size)
+    block = "\n".join(
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 15)))
+        for _ in range(2000)
+    ).encode("utf-8") + b"\n"
+    with open(path, "wb") as f:
+        written = 0
+        while written + len(block) <= size:
+            f.write(block)
+            written += len(block)
+        # Pad with ASCII so no multi-byte character is cut in half
+        f.write(b"x" * (size - written))
+
+def run_single(implementation: str, path: str) -> None:
+    """Child process entry point: run one implementation and print JSON."""
+    # Keep module import time out of the measurement
+    import app.core.text_stats  # noqa: F401
+
+    start = time.perf_counter()
+    counts = IMPLEMENTATIONS[implementation](path)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "peak_rss_mb": peak_kb / 1024, "counts": counts}))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1M,100M,1G")
+    parser.add_argument("--run", nargs=2, metavar=("IMPLEMENTATION", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_single(*args.run)
+        return
+
+    print(f"{'size':>8} {'implementation':>14} {'seconds':>10} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_label in args.sizes.split(","):
+            path = os.path.join(tmp, f"{size_label}.txt")
+            generate_file(path, parse_size(size_label))
+
+            counts = {}
+            for implementation in IMPLEMENTATIONS:
+                process = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.text_stats", "--run", implementation, path],
+                    capture_output=True, text=True
+                )
+                if process.returncode != 0:
+                    # Usually the OOM killer on the legacy implementation
+                    print(f"{size_label:>8} {implementation:>14} {'failed':>10} (exit code {process.returncode})")
+                    continue
+                result = json.loads(process.stdout)
+                counts[implementation] = result["counts"]
+                print(f"{size_label:>8} {implementation:>14} {result['seconds']:>10.2f} {result['peak_rss_mb']:>12.1f}")
+
+            if len(counts) == 2 and counts["legacy"] != counts["streaming"]:
+                print(f"{size_label:>8} MISMATCH {counts}")
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()
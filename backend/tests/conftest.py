@@ -0,0 +1,84 @@
+"""
+Shared fixtures. Settings are read when app.config is imported, so the
+environment points the app at a throwaway SQLite database and storage
+folders before anything from app is imported.
+"""
+import itertools
+import os
+import tempfile
+
+DATA_DIR = tempfile.mkdtemp(prefix="omarigato-tests-")
+os.environ.update(
+    DB_BACKEND="sqlite",
+    SQLITE_PATH=os.path.join(DATA_DIR, "test.db"),
+    UPLOAD_FOLDER=os.path.join(DATA_DIR, "uploads"),
+    THUMBNAIL_FOLDER=os.path.join(DATA_DIR, "thumbnails"),
+    STORAGE_CACHE_FOLDER=os.path.join(DATA_DIR, "storage_cache"),
+    STORAGE_BACKEND="sharded",
+)
+os.environ.pop("USER_CACHE_REDIS_URL", None)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.main import app
+from app.database import SessionLocal
+from app.models.user import User
+from app.core.file_parser import FileParser
+from app.core.processing import claim_file
+
+# Every test registers its own users, so tests never see each other's files
+_user_numbers = itertools.count()
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture
+def register(client):
+    """Register and log in a new user, returning its auth headers."""
+    def register(admin=False):
+        username = f"user{next(_user_numbers)}"
+        password = "password1"
+        response = client.post("/api/auth/register", json={
+            "email": f"{username}@example.com",
+            "username": username,
+            "password": password,
+            "confirm_password": password,
+        })
+        assert response.status_code == 201, response.text
+        if admin:
+            with SessionLocal() as db:
+                db.execute(update(User).where(User.username == username).values(is_admin=True))
+                db.commit()
+        token = client.post("/api/auth/login", data={"username": username, "password": password}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+    return register
+
+@pytest.fixture
+def auth_headers(register):
+    return register()
+
+@pytest.fixture
+def upload(client, auth_headers):
+    """Upload a file as the test's user, returning the created file."""
+    def upload(filename, content, content_type="application/octet-stream", headers=None):
+        response = client.post(
+            "/api/files/upload",
+            files={"file": (filename, content, content_type)},
+            headers=headers or auth_headers
+        )
+        assert response.status_code == 201, response.text
+        return response.json()
+    return upload
+
+@pytest.fixture
+def process():
+    """Claim a pending file and parse it in this process, as the worker would."""
+    def process(file_id):
+        with SessionLocal() as db:
+            assert claim_file(db, file_id)
+        return FileParser.process_file(file_id)
+    return process
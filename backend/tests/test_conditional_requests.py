@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy import update
+
+from app.database import SessionLocal
+from app.models.file import File, ProcessingStatus
+from app.core.http_cache import response_cache
+from app.core.processing import claim_file, heartbeat
+
+def revalidate(client, headers, url):
+    """GET a URL, then again with its ETag; returns both responses."""
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "private, no-cache"
+    return first, client.get(url, headers={**headers, "If-None-Match": first.headers["etag"]})
+
+@pytest.mark.parametrize("url", ["/api/auth/me", "/api/files/", "/api/files/{id}", "/api/users/{user_id}"])
+def test_unchanged_responses_revalidate(client, auth_headers, upload, url):
+    file = upload("a.txt", b"conditional", "text/plain")
+    user_id = client.get("/api/auth/me", headers=auth_headers).json()["id"]
+
+    _, second = revalidate(client, auth_headers, url.format(id=file["id"], user_id=user_id))
+
+    assert second.status_code == 304
+    assert second.content == b""
+
+def test_listing_changes_with_uploads(client, auth_headers, upload):
+    upload("b.txt", b"first", "text/plain")
+    first = client.get("/api/files/", headers=auth_headers)
+
+    upload("c.txt", b"second", "text/plain")
+    response = client.get("/api/files/", headers={**auth_headers, "If-None-Match": first.headers["etag"]})
+
+    assert response.status_code == 200
+    assert response.json()["total"] == 2
+
+def test_file_changes_with_status(client, auth_headers, upload):
+    file = upload("d.txt", b"status", "text/plain")
+    url = f"/api/files/{file['id']}"
+    etag = client.get(url, headers=auth_headers).headers["etag"]
+
+    with SessionLocal() as db:
+        claim_file(db, file["id"])
+
+    assert client.get(url, headers={**auth_headers, "If-None-Match": etag}).status_code == 200
+
+def test_worker_heartbeat_keeps_etag(client, auth_headers, upload):
+    file = upload("e.txt", b"heartbeat", "text/plain")
+    with SessionLocal() as db:
+        claim_file(db, file["id"])
+    url = f"/api/files/{file['id']}"
+    etag = client.get(url, headers=auth_headers).headers["etag"]
+
+    with SessionLocal() as db:
+        heartbeat(db, [file["id"]])
+
+    assert client.get(url, headers={**auth_headers, "If-None-Match": etag}).status_code == 304
+
+def test_profile_changes_with_update(client, auth_headers):
+    etag = client.get("/api/auth/me", headers=auth_headers).headers["etag"]
+    client.put("/api/users/me", json={"profile_picture": "new.png"}, headers=auth_headers)
+
+    response = client.get("/api/auth/me", headers={**auth_headers, "If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.json()["profile_picture"] == "new.png"
+
+@pytest.fixture
+def cached_responses(monkeypatch):
+    monkeypatch.setattr(response_cache, "ttl", 60)
+    yield response_cache
+    response_cache.entries.clear()
+
+def test_response_cache_is_invalidated_by_writes(client, auth_headers, upload, cached_responses):
+    file = upload("f.txt", b"cached", "text/plain")
+    url = f"/api/files/{file['id']}"
+    client.get("/api/files/", headers=auth_headers)
+    client.get(url, headers=auth_headers)
+
+    # Served from the cache: a change made outside this process isn't seen until the entry expires
+    with SessionLocal() as db:
+        db.execute(update(File).where(File.id == file["id"]).values(status=ProcessingStatus.FAILED))
+        db.commit()
+    hits = cached_responses.hits
+    assert client.get(url, headers=auth_headers).json()["status"] == "pending"
+    assert cached_responses.hits == hits + 1
+
+    # A write through this process drops the user's entries
+    upload("g.txt", b"another", "text/plain")
+    assert client.get(url, headers=auth_headers).json()["status"] == "failed"
+    assert client.get("/api/files/", headers=auth_headers).json()["total"] == 2
+
+def test_response_cache_is_per_user(client, register, upload, cached_responses):
+    owner = register()
+    upload("h.txt", b"private", "text/plain", headers=owner)
+    client.get("/api/files/", headers=owner)
+
+    assert client.get("/api/files/", headers=register()).json()["total"] == 0
@@ -0,0 +1,81 @@
+import pytest
+
+from app.core.http_cache import etag_matches, parse_byte_range
+
+CONTENT = bytes(range(256)) * 40  # 10240 bytes
+
+@pytest.fixture
+def file(upload):
+    return upload("data.txt", CONTENT, "text/plain")
+
+def get_content(client, headers, file, **extra):
+    return client.get(f"/api/files/{file['id']}/content", headers={**headers, **extra})
+
+def test_full_content(client, auth_headers, file):
+    response = get_content(client, auth_headers, file)
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"] == f'"{file["filename"].split(".")[0]}"'
+    assert response.headers["content-disposition"].startswith("attachment")
+
+def test_conditional_request(client, auth_headers, file):
+    etag = get_content(client, auth_headers, file).headers["etag"]
+
+    response = get_content(client, auth_headers, file, **{"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert get_content(client, auth_headers, file, **{"If-None-Match": '"other"'}).status_code == 200
+
+@pytest.mark.parametrize("header, start, end", [
+    ("bytes=0-99", 0, 99),
+    ("bytes=10000-", 10000, 10239),
+    ("bytes=-40", 10200, 10239),
+    ("bytes=10200-99999", 10200, 10239),
+])
+def test_range(client, auth_headers, file, header, start, end):
+    response = get_content(client, auth_headers, file, Range=header)
+
+    assert response.status_code == 206
+    assert response.content == CONTENT[start:end + 1]
+    assert response.headers["content-range"] == f"bytes {start}-{end}/{len(CONTENT)}"
+    assert response.headers["content-length"] == str(end - start + 1)
+
+def test_unsatisfiable_range(client, auth_headers, file):
+    response = get_content(client, auth_headers, file, Range="bytes=10240-")
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+@pytest.mark.parametrize("header", ["bytes=0-9,20-29", "items=0-9", "bytes=abc", "bytes=9-0"])
+def test_ignored_ranges_send_everything(client, auth_headers, file, header):
+    response = get_content(client, auth_headers, file, Range=header)
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+def test_token_in_query(client, auth_headers, file):
+    token = auth_headers["Authorization"].split()[1]
+    response = client.get(f"/api/files/{file['id']}/content", params={"access_token": token})
+    assert response.status_code == 200
+
+def test_other_users_file(client, register, file):
+    assert get_content(client, register(), file).status_code == 404
+
+def test_etag_matches():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert etag_matches('"b"', 'W/"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+def test_parse_byte_range():
+    assert parse_byte_range(None, 10) is None
+    assert parse_byte_range("bytes=2-", 10) == (2, 9)
+    assert parse_byte_range("bytes=-20", 10) == (0, 9)
+    with pytest.raises(ValueError):
+        parse_byte_range("bytes=10-", 10)
+    with pytest.raises(ValueError):
+        parse_byte_range("bytes=-5", 0)
@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy.engine import make_url
+
+from app.database import MeteredAsyncQueuePool, MeteredQueuePool, get_async_database_url
+
+@pytest.mark.parametrize("url, driver", [
+    ("sqlite:///anime_portal.db", "sqlite+aiosqlite"),
+    ("postgresql+psycopg2://user@localhost/anime_portal", "postgresql+asyncpg"),
+    ("mssql+pyodbc://localhost/anime_portal?driver=ODBC+Driver+17+for+SQL+Server", "mssql+aioodbc"),
+])
+def test_async_driver_of_each_backend(url, driver):
+    async_url = get_async_database_url(make_url(url))
+
+    assert async_url.drivername == driver
+    assert async_url.set(drivername=make_url(url).drivername) == make_url(url)
+
+def test_requests_use_the_async_engine(client, auth_headers, upload):
+    upload("a.txt", b"async session", "text/plain")
+    async_checkouts = MeteredAsyncQueuePool.metrics.checkouts
+    sync_checkouts = MeteredQueuePool.metrics.checkouts
+
+    assert client.get("/api/files/", headers=auth_headers).json()["total"] == 1
+
+    assert MeteredAsyncQueuePool.metrics.checkouts > async_checkouts
+    assert MeteredQueuePool.metrics.checkouts == sync_checkouts
@@ -0,0 +1,71 @@
+import asyncio
+
+from sqlalchemy import delete
+
+from app.database import SessionLocal
+from app.models.file import File
+from app.core.events import FileEvent, broker, stream_file_events
+
+def collect(stream, after_frame=None):
+    """Run an SSE stream to its end, calling after_frame(frames) after each frame."""
+    async def run():
+        frames = []
+        async for frame in stream:
+            frames.append(frame)
+            if after_frame:
+                await after_frame(frames)
+        return frames
+    return asyncio.run(asyncio.wait_for(run(), timeout=10))
+
+def event_names(frames):
+    return [frame.split("\n")[0] for frame in frames]
+
+def test_stream_ends_when_the_row_disappears(upload):
+    file = upload("a.txt", b"hello", "text/plain")
+
+    async def delete_row(frames):
+        # Deleted by another process: found by the polling broker
+        if len(frames) == 1:
+            with SessionLocal() as db:
+                db.execute(delete(File).where(File.id == file["id"]))
+                db.commit()
+
+    frames = collect(stream_file_events([file["id"]]), delete_row)
+
+    assert event_names(frames) == ["event: status", "event: deleted", "event: done"]
+    assert frames[1] == f'event: deleted\ndata: {{"file_id":{file["id"]}}}\n\n'
+
+def test_stream_ends_on_published_deletion(upload):
+    file = upload("b.txt", b"hello again", "text/plain")
+
+    async def publish_deletion(frames):
+        if len(frames) == 1:
+            await broker.publish(FileEvent.deletion(file["id"]))
+
+    frames = collect(stream_file_events([file["id"]]), publish_deletion)
+
+    assert event_names(frames) == ["event: status", "event: deleted", "event: done"]
+
+def test_other_files_are_still_watched(upload, process):
+    kept = upload("c.txt", b"kept", "text/plain")
+    deleted = upload("d.txt", b"deleted", "text/plain")
+
+    async def step(frames):
+        if len(frames) == 2:
+            await broker.publish(FileEvent.deletion(deleted["id"]))
+        elif len(frames) == 3:
+            await asyncio.to_thread(process, kept["id"])
+
+    frames = collect(stream_file_events([kept["id"], deleted["id"]]), step)
+
+    assert event_names(frames)[2] == "event: deleted"
+    assert event_names(frames)[-1] == "event: done"
+    assert '"status":"completed"' in frames[-2]
+
+def test_stream_reports_files_deleted_before_subscribing(client, auth_headers, upload):
+    file = upload("e.txt", b"bye", "text/plain")
+    client.delete(f"/api/files/{file['id']}", headers=auth_headers)
+
+    frames = collect(stream_file_events([file["id"]]))
+
+    assert event_names(frames) == ["event: deleted", "event: done"]
@@ -0,0 +1,41 @@
+import io
+
+from openpyxl import Workbook
+
+from app.core.excel_analyzer import analyze_workbook
+
+def make_workbook() -> bytes:
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "People"
+    sheet.append(["name", "age"])
+    sheet.append(["Ann", 31])
+    sheet.append(["Bob", 42])
+    workbook.create_sheet("Empty")
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+def test_analyze_workbook_without_extension(tmp_path):
+    # Stored content is named "<sha256>.<generation>", which openpyxl can't guess a format from
+    path = tmp_path / ("ab" * 32 + ".745d9dd1")
+    path.write_bytes(make_workbook())
+
+    result = analyze_workbook(str(path))
+
+    assert result["sheet_names"] == ["People", "Empty"]
+    assert result["rows"] == 2
+    assert result["column_names"] == ["name", "age"]
+    assert result["sample_data"][0] == {"name": "Ann", "age": 31}
+
+def test_uploaded_workbook_is_parsed(upload, process, client, auth_headers):
+    file = upload("people.xlsx", make_workbook(),
+                  "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    assert not file["filename"].endswith(".xlsx")
+
+    process(file["id"])
+
+    detail = client.get(f"/api/files/{file['id']}", headers=auth_headers).json()
+    assert detail["status"] == "completed", detail["processing_result"]
+    assert detail["processing_result"]["type"] == "excel"
+    assert detail["processing_result"]["sheet_names"] == ["People", "Empty"]
@@ -0,0 +1,84 @@
+import re
+
+def make_pdf(pages):
+    """A minimal PDF with one line of Helvetica text per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream.decode()}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+def assert_stored_without_extension(file, extension):
+    # Content is stored as "<sha256>.<generation>", not under the uploaded name
+    assert re.fullmatch(r"[0-9a-f]{64}\.[0-9a-f]+", file["filename"])
+    assert not file["filename"].endswith(extension)
+
+def parsed(client, headers, process, file):
+    process(file["id"])
+    detail = client.get(f"/api/files/{file['id']}", headers=headers).json()
+    assert detail["status"] == "completed", detail["processing_result"]
+    return detail["processing_result"]
+
+def test_csv(client, auth_headers, upload, process):
+    file = upload("people.csv", b"name;age\nAnn;31\nBob;\nCid;27\n", "text/csv")
+    assert_stored_without_extension(file, ".csv")
+
+    result = parsed(client, auth_headers, process, file)
+
+    assert result["type"] == "csv"
+    assert result["delimiter"] == ";"
+    assert result["column_names"] == ["name", "age"]
+    assert result["rows"] == 3
+    assert result["sample_data"][1] == {"name": "Bob", "age": None}
+    assert result["column_stats"]["age"]["null_count"] == 1
+
+def test_text(client, auth_headers, upload, process):
+    content = "Première ligne du texte\nsecond line here\n\nlast".encode("utf-8")
+    file = upload("notes.txt", content, "text/plain")
+    assert_stored_without_extension(file, ".txt")
+
+    result = parsed(client, auth_headers, process, file)
+
+    assert result["type"] == "text"
+    assert result["encoding"] == "utf-8"
+    assert result["line_count"] == 4
+    assert result["word_count"] == 8
+    assert result["character_count"] == len(content.decode("utf-8"))
+    assert result["preview"].startswith("Première ligne")
+
+def test_pdf(client, auth_headers, upload, process):
+    file = upload("report.pdf", make_pdf(["First page", "Second page"]), "application/pdf")
+    assert_stored_without_extension(file, ".pdf")
+
+    result = parsed(client, auth_headers, process, file)
+
+    assert result["type"] == "pdf"
+    assert result["page_count"] == 2
+    assert [page["text"] for page in result["pages"]] == ["First page", "Second page"]
+    assert result["partial"] is False
+    assert result["truncated"] is False
+
+def test_pdf_character_budget(client, auth_headers, upload, process, monkeypatch):
+    from app.config import settings
+    monkeypatch.setattr(settings, "PDF_MAX_CHARS", 8)
+    file = upload("long.pdf", make_pdf(["Opening page", "Closing page"]), "application/pdf")
+
+    result = parsed(client, auth_headers, process, file)
+
+    assert [page["text"] for page in result["pages"]] == ["Opening "]
+    assert result["truncated"] is True
@@ -0,0 +1,95 @@
+import itertools
+
+import pytest
+from google.auth.transport import requests
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models.user import User
+from app.core import google_auth
+
+class FakeResponse:
+    def __init__(self, cache_control):
+        self.status = 200
+        self.headers = {"cache-control": cache_control}
+        self.data = b"{}"
+
+class FakeGoogle:
+    """Records what reaches google-auth's transport instead of calling Google."""
+
+    def __init__(self):
+        self.fetches = []
+        self.cache_control = "public, max-age=3600"
+
+    def fetch(self, url, method="GET", body=None, headers=None, timeout=120, **kwargs):
+        self.fetches.append((url, method, timeout))
+        return FakeResponse(self.cache_control)
+
+@pytest.fixture
+def google(monkeypatch):
+    google = FakeGoogle()
+    monkeypatch.setattr(requests.Request, "__call__", lambda self, *args, **kwargs: google.fetch(*args, **kwargs))
+    return google
+
+def test_certificates_are_fetched_once(google):
+    request = google_auth.CachingRequest()
+
+    first = request("https://certs.example/oauth2/v1/certs", method="GET")
+    second = request("https://certs.example/oauth2/v1/certs", method="GET")
+
+    assert second is first
+    # No timeout from the caller, so google-auth's own default applies
+    assert google.fetches == [("https://certs.example/oauth2/v1/certs", "GET", 120)]
+
+def test_uncacheable_responses_are_fetched_again(google):
+    google.cache_control = "no-store"
+    request = google_auth.CachingRequest()
+
+    request("https://certs.example/certs")
+    request("https://certs.example/certs")
+    request("https://certs.example/token", method="POST", body=b"{}", timeout=5)
+
+    assert [timeout for _, _, timeout in google.fetches] == [120, 120, 5]
+
+_google_ids = itertools.count()
+
+@pytest.fixture
+def google_login(client, monkeypatch):
+    """Sign in through /api/auth/google with the given token claims."""
+    def google_login(name, email=None):
+        sub = f"google-{next(_google_ids)}"
+        user_info = {"sub": sub, "email": email or f"{sub}@example.com", "name": name}
+        monkeypatch.setattr("app.api.auth.verify_google_token", lambda token: user_info)
+        response = client.post("/api/auth/google", json={"token": "id-token"})
+        assert response.status_code == 200, response.text
+        with SessionLocal() as db:
+            return db.scalar(select(User).where(User.google_id == sub))
+    return google_login
+
+def test_new_google_user_has_no_password(google_login):
+    user = google_login("Mika Tanaka")
+
+    assert user.username == "MikaTanaka"
+    assert user.hashed_password is None
+
+def test_returning_google_user_is_reused(client, google_login):
+    user = google_login("Returning User")
+
+    response = client.post("/api/auth/google", json={"token": "id-token"})
+
+    assert response.status_code == 200
+    with SessionLocal() as db:
+        assert db.scalar(select(User.id).where(User.username.startswith("ReturningUser"))) == user.id
+
+def test_taken_username_gets_a_free_suffix(google_login, monkeypatch):
+    google_login("Aoi Sora")
+    google_login("Aoi Sora")  # takes AoiSora_ plus a random suffix
+    with SessionLocal() as db:
+        taken = db.scalar(select(User.username).where(User.username.startswith("AoiSora_")))
+    # Draw the suffix already taken first, then a free one
+    suffixes = itertools.chain(taken.split("_")[1], itertools.repeat("z"))
+    monkeypatch.setattr(google_auth.secrets, "choice", lambda alphabet: next(suffixes))
+
+    user = google_login("Aoi Sora")
+
+    assert user.username == "AoiSora_zzzz"
@@ -0,0 +1,19 @@
+def test_db_metrics_require_admin(client, register):
+    assert client.get("/api/metrics/db").status_code == 401
+    assert client.get("/api/metrics/db", headers=register()).status_code == 403
+
+def test_db_metrics_for_admin(client, register):
+    response = client.get("/api/metrics/db", headers=register(admin=True))
+    assert response.status_code == 200
+    assert response.json()["backend"] == "sqlite"
+
+def test_cache_metrics_require_admin(client, register):
+    assert client.get("/api/metrics/cache").status_code == 401
+    assert client.get("/api/metrics/cache", headers=register()).status_code == 403
+    assert client.get("/api/metrics/cache", headers=register(admin=True)).status_code == 200
+
+def test_password_hashing_metrics_require_admin(client, register):
+    # Queue depth would help time a login flood
+    assert client.get("/api/metrics/password-hashing").status_code == 401
+    assert client.get("/api/metrics/password-hashing", headers=register()).status_code == 403
+    assert client.get("/api/metrics/password-hashing", headers=register(admin=True)).status_code == 200
@@ -0,0 +1,61 @@
+import io
+import threading
+
+import pytest
+from PIL import Image
+from sqlalchemy import select, update
+
+from app.core import mime
+from app.database import SessionLocal
+from app.models.file import File
+
+def mime_type_of(file_id):
+    with SessionLocal() as db:
+        return db.scalar(select(File.mime_type).where(File.id == file_id))
+
+@pytest.fixture
+def no_sniffing(monkeypatch):
+    """Make any MIME detection during processing fail the test."""
+    def sniff(header):
+        raise AssertionError("MIME type detected again")
+    monkeypatch.setattr("app.core.file_parser.detect_mime_from_buffer", sniff)
+
+def test_type_is_detected_from_the_upload(upload):
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4), "navy").save(buffer, format="PNG")
+
+    # Neither the extension nor the client's content type is trusted
+    file = upload("not-text.txt", buffer.getvalue(), "text/plain")
+
+    assert file["file_type"] == "text/plain"
+    assert file["mime_type"] == "image/png"
+
+def test_processing_and_reprocessing_reuse_the_detected_type(client, auth_headers, upload, process, no_sniffing):
+    file = upload("a.txt", b"detected once", "text/plain")
+
+    process(file["id"])
+    assert client.post(f"/api/files/{file['id']}/reprocess", headers=auth_headers).json()["outcome"] == "queued"
+    process(file["id"])
+
+    assert client.get(f"/api/files/{file['id']}", headers=auth_headers).json()["status"] == "completed"
+    assert mime_type_of(file["id"]) == "text/plain"
+
+def test_files_without_a_type_are_sniffed_once(upload, process):
+    file = upload("b.txt", b"uploaded before detection", "text/plain")
+    with SessionLocal() as db:
+        db.execute(update(File).where(File.id == file["id"]).values(mime_type=None))
+        db.commit()
+
+    process(file["id"])
+
+    assert mime_type_of(file["id"]) == "text/plain"
+
+def test_each_thread_reuses_its_own_libmagic_handle():
+    handles = []
+    thread = threading.Thread(target=lambda: handles.extend([mime._get_magic(), mime._get_magic()]))
+    thread.start()
+    thread.join()
+
+    assert handles[0] is handles[1]
+    assert mime._get_magic() is mime._get_magic()
+    assert mime._get_magic() is not handles[0]
@@ -0,0 +1,92 @@
+import pytest
+from sqlalchemy import update
+
+from app.database import SessionLocal
+from app.models.file import File, ProcessingStatus
+from app.models.user import User
+
+@pytest.fixture
+def files(upload):
+    """Five files of the test's user, uploaded within the same second or so."""
+    return [upload(f"{index}.txt", f"file {index}".encode(), "text/plain") for index in range(5)]
+
+def pages(client, headers, **params):
+    """Follow next_cursor through every page, returning the pages' file ids."""
+    result = []
+    cursor = None
+    while True:
+        query = {**params, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/files/", headers=headers, params=query)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        result.append([file["id"] for file in body["files"]])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return result
+
+def test_cursor_walks_every_file_once(client, auth_headers, files):
+    ids = [file["id"] for file in files]
+
+    assert pages(client, auth_headers, limit=2) == [ids[0:2], ids[2:4], ids[4:5]]
+    assert pages(client, auth_headers, limit=2, order="desc") == [ids[4:2:-1], ids[2:0:-1], ids[0:1]]
+
+def test_cursor_is_stable_when_earlier_rows_are_deleted(client, auth_headers, files):
+    ids = [file["id"] for file in files]
+    first = client.get("/api/files/", headers=auth_headers, params={"limit": 2}).json()
+
+    client.delete(f"/api/files/{ids[0]}", headers=auth_headers)
+    second = client.get("/api/files/", headers=auth_headers, params={"limit": 2, "cursor": first["next_cursor"]}).json()
+
+    # An offset would now skip ids[2]
+    assert [file["id"] for file in second["files"]] == ids[2:4]
+
+def test_sort_by_status_and_filter(client, auth_headers, files):
+    ids = [file["id"] for file in files]
+    with SessionLocal() as db:
+        db.execute(update(File).where(File.id.in_(ids[1::2])).values(status=ProcessingStatus.COMPLETED))
+        db.commit()
+
+    by_status = sum(pages(client, auth_headers, limit=2, sort="status"), [])
+    assert by_status == ids[1::2] + ids[0::2]  # "completed" sorts before "pending"
+
+    completed = client.get("/api/files/", headers=auth_headers, params={"status": "completed"}).json()
+    assert [file["id"] for file in completed["files"]] == ids[1::2]
+    assert completed["total"] == 2
+
+def test_total_follows_uploads_and_deletes(client, auth_headers, files):
+    client.delete(f"/api/files/{files[0]['id']}", headers=auth_headers)
+    assert client.get("/api/files/", headers=auth_headers).json()["total"] == 4
+
+def test_files_of_other_users_are_not_listed(client, register, files):
+    assert client.get("/api/files/", headers=register()).json() == {"total": 0, "files": [], "next_cursor": None}
+
+def test_bad_cursor(client, auth_headers):
+    assert client.get("/api/files/", headers=auth_headers, params={"cursor": "not-a-cursor"}).status_code == 400
+
+def test_cursor_of_another_sort_order(client, auth_headers, files):
+    cursor = client.get("/api/files/", headers=auth_headers, params={"limit": 2}).json()["next_cursor"]
+    response = client.get("/api/files/", headers=auth_headers, params={"limit": 2, "cursor": cursor, "order": "desc"})
+    assert response.status_code == 400
+
+def test_sparse_fields(client, auth_headers, files):
+    body = client.get("/api/files/", headers=auth_headers, params={"fields": "status", "include_total": "false"}).json()
+    assert body["total"] is None
+    assert body["files"][0] == {"id": files[0]["id"], "status": "pending"}
+
+def test_unknown_fields(client, auth_headers):
+    assert client.get("/api/files/", headers=auth_headers, params={"fields": "id,secret"}).status_code == 400
+
+def test_file_counter_leaves_profile_etag_alone(client, auth_headers, upload, monkeypatch):
+    # Read the user from the database every time, as other workers would
+    monkeypatch.setattr("app.config.settings.USER_CACHE_ENABLED", False)
+    me = client.get("/api/auth/me", headers=auth_headers)
+    etag = me.headers["etag"]
+
+    file = upload("counted.txt", b"counted", "text/plain")
+    client.delete(f"/api/files/{file['id']}", headers=auth_headers)
+    with SessionLocal() as db:
+        db.execute(update(User).where(User.id == me.json()["id"]).values(file_count=None, updated_at=User.updated_at))
+        db.commit()
+    assert client.get("/api/files/", headers=auth_headers).json()["total"] == 0
+
+    assert client.get("/api/auth/me", headers={**auth_headers, "If-None-Match": etag}).status_code == 304
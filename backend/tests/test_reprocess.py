@@ -0,0 +1,128 @@
+import asyncio
+
+import httpx
+from sqlalchemy import select, update
+
+from app.main import app
+from app.database import SessionLocal
+from app.models.file import File, ProcessingStatus
+from app.models.reprocess_request import ReprocessRequest
+
+def reprocess(client, headers, file_id, key=None, **params):
+    if key:
+        headers = {**headers, "Idempotency-Key": key}
+    return client.post(f"/api/files/{file_id}/reprocess", headers=headers, params=params)
+
+def status_of(file_id):
+    with SessionLocal() as db:
+        return db.scalar(select(File.status).where(File.id == file_id))
+
+def test_requests_for_a_queued_file_join_its_run(client, auth_headers, upload, process):
+    file = upload("a.csv", b"a,b\n1,2\n", "text/csv")
+    assert reprocess(client, auth_headers, file["id"]).json()["outcome"] == "already_queued"
+
+    process(file["id"])
+    assert reprocess(client, auth_headers, file["id"]).json()["outcome"] == "queued"
+    assert status_of(file["id"]) == ProcessingStatus.PENDING
+    assert reprocess(client, auth_headers, file["id"]).json()["outcome"] == "already_queued"
+
+def test_file_being_processed_is_not_requeued(client, auth_headers, upload):
+    file = upload("b.csv", b"a,b\n3,4\n", "text/csv")
+    with SessionLocal() as db:
+        db.execute(update(File).where(File.id == file["id"]).values(status=ProcessingStatus.PROCESSING))
+        db.commit()
+
+    assert reprocess(client, auth_headers, file["id"]).json()["outcome"] == "already_queued"
+    assert status_of(file["id"]) == ProcessingStatus.PROCESSING
+
+def test_concurrent_requests_queue_once(auth_headers, upload, process):
+    file = upload("c.csv", b"a,b\n5,6\n", "text/csv")
+    process(file["id"])
+
+    async def burst():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[
+                client.post(f"/api/files/{file['id']}/reprocess", headers=auth_headers) for _ in range(10)
+            ])
+
+    outcomes = [response.json()["outcome"] for response in asyncio.run(burst())]
+    assert sorted(outcomes) == ["already_queued"] * 9 + ["queued"]
+
+def test_retry_with_same_key_replays_outcome(client, auth_headers, upload, process):
+    file = upload("d.csv", b"a,b\n7,8\n", "text/csv")
+    process(file["id"])
+
+    first = reprocess(client, auth_headers, file["id"], key="retry-1")
+    process(file["id"])
+    retry = reprocess(client, auth_headers, file["id"], key="retry-1")
+
+    assert first.json()["outcome"] == retry.json()["outcome"] == "queued"
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    # The replay didn't queue the file again
+    assert status_of(file["id"]) == ProcessingStatus.COMPLETED
+
+def test_key_reused_for_another_file(client, auth_headers, upload, process):
+    first = upload("e.csv", b"a,b\n9,0\n", "text/csv")
+    second = upload("f.csv", b"a,b\n0,9\n", "text/csv")
+    process(first["id"])
+
+    assert reprocess(client, auth_headers, first["id"], key="shared").status_code == 200
+    assert reprocess(client, auth_headers, second["id"], key="shared").status_code == 422
+
+def test_keys_are_per_user(client, register, upload, process):
+    owner = register()
+    other = register()
+    file = upload("g.csv", b"a,b\n1,1\n", "text/csv", headers=owner)
+    other_file = upload("h.csv", b"a,b\n2,2\n", "text/csv", headers=other)
+    process(file["id"])
+    process(other_file["id"])
+
+    assert reprocess(client, owner, file["id"], key="mine").json()["outcome"] == "queued"
+    assert reprocess(client, other, other_file["id"], key="mine").json()["outcome"] == "queued"
+
+def test_skip_unchanged(client, auth_headers, upload, process):
+    file = upload("i.csv", b"a,b\n3,3\n", "text/csv")
+    process(file["id"])
+
+    response = reprocess(client, auth_headers, file["id"], skip_unchanged="true")
+    assert response.json()["outcome"] == "unchanged"
+    assert status_of(file["id"]) == ProcessingStatus.COMPLETED
+
+def test_skip_unchanged_reuses_result_of_same_content(client, auth_headers, upload, process):
+    parsed = upload("j.csv", b"a,b\n4,4\n", "text/csv")
+    process(parsed["id"])
+    copy = upload("k.csv", b"a,b\n4,4\n", "text/csv")  # Gets the parsed file's result at upload
+    with SessionLocal() as db:
+        db.execute(update(File).where(File.id == copy["id"]).values(
+            status=ProcessingStatus.FAILED, processing_result={"error": "boom"}, parser_version=None
+        ))
+        db.commit()
+
+    response = reprocess(client, auth_headers, copy["id"], skip_unchanged="true")
+
+    assert response.json()["outcome"] == "reused"
+    detail = client.get(f"/api/files/{copy['id']}", headers=auth_headers).json()
+    assert detail["status"] == "completed"
+    assert detail["processing_result"]["type"] == "csv"
+
+def test_conflict_without_a_replayable_request(client, auth_headers, upload, process, monkeypatch):
+    file = upload("l.csv", b"a,b\n5,5\n", "text/csv")
+    process(file["id"])
+    user_id = client.get("/api/auth/me", headers=auth_headers).json()["id"]
+    with SessionLocal() as db:
+        db.add(ReprocessRequest(owner_id=user_id, idempotency_key="lost", file_id=file["id"], outcome="queued"))
+        db.commit()
+
+    # The row that caused the IntegrityError can't be found again
+    async def not_found(*args):
+        return None
+    monkeypatch.setattr("app.api.files.find_reprocess_request", not_found)
+
+    response = reprocess(client, auth_headers, file["id"], key="lost")
+
+    assert response.status_code == 409
+    assert status_of(file["id"]) == ProcessingStatus.COMPLETED  # The requeue was rolled back
+
+def test_unknown_file(client, auth_headers):
+    assert reprocess(client, auth_headers, 10 ** 9).status_code == 404
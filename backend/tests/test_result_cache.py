@@ -0,0 +1,25 @@
+from sqlalchemy import update
+
+from app.database import SessionLocal
+from app.models.file import File, ProcessingStatus
+
+def set_result(file_id, result):
+    with SessionLocal() as db:
+        db.execute(update(File).where(File.id == file_id).values(
+            status=ProcessingStatus.COMPLETED, processing_result=result
+        ))
+        db.commit()
+
+def test_writes_within_a_second_are_not_served_stale(client, auth_headers, upload):
+    file = upload("a.txt", b"written twice", "text/plain")
+    url = f"/api/files/{file['id']}"
+
+    set_result(file["id"], {"pass": 1})
+    first = client.get(url, headers=auth_headers)
+    set_result(file["id"], {"pass": 2})
+    second = client.get(url, headers=auth_headers)
+
+    assert first.json()["processing_result"] == {"pass": 1}
+    assert second.json()["processing_result"] == {"pass": 2}
+    assert second.headers["etag"] != first.headers["etag"]
+    assert client.get(f"{url}/status", headers=auth_headers).json()["processing_result"] == {"pass": 2}
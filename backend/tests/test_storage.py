@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from app.core.storage import LocalStorage, ReadThroughCache, Storage
+
+def test_incomplete_backend_fails_when_created():
+    class Incomplete(Storage):
+        def key_for(self, name):
+            return name
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_local_storage_is_complete(tmp_path):
+    LocalStorage(str(tmp_path))
+
+def write(content):
+    def fetch(dest_path):
+        with open(dest_path, "wb") as f:
+            f.write(content)
+    return fetch
+
+def test_cache_fetches_once(tmp_path):
+    cache = ReadThroughCache(str(tmp_path), max_size=1024)
+    fetches = []
+
+    def fetch(dest_path):
+        fetches.append(dest_path)
+        write(b"content")(dest_path)
+
+    for _ in range(2):
+        with cache.use("key", fetch) as path:
+            with open(path, "rb") as f:
+                assert f.read() == b"content"
+    assert len(fetches) == 1
+
+def test_path_in_use_survives_eviction(tmp_path):
+    # Each entry alone fills the cache, so storing b evicts a
+    cache = ReadThroughCache(str(tmp_path), max_size=10)
+    with cache.use("a", write(b"a" * 10)) as path:
+        with cache.use("b", write(b"b" * 10)):
+            pass
+        assert not os.path.exists(cache._path("a"))
+        with open(path, "rb") as f:
+            assert f.read() == b"a" * 10
+    # Nothing but the cache entries is left behind
+    assert os.listdir(tmp_path) == [os.path.basename(cache._path("b"))]
+
+def test_entry_evicted_between_lookups_is_fetched_again(tmp_path):
+    cache = ReadThroughCache(str(tmp_path), max_size=1024)
+    with cache.use("key", write(b"old")):
+        pass
+    os.remove(cache._path("key"))  # Evicted by another process
+    with cache.use("key", write(b"new")) as path:
+        with open(path, "rb") as f:
+            assert f.read() == b"new"
@@ -0,0 +1,70 @@
+import io
+
+import pytest
+from PIL import Image
+
+from app.core.images import generate_thumbnail
+
+def image_bytes(width, height, format, color="teal"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, format=format)
+    return buffer.getvalue()
+
+def thumbnail_size(response):
+    with Image.open(io.BytesIO(response.content)) as img:
+        assert img.format == "WEBP"
+        return img.size
+
+@pytest.fixture
+def image(upload):
+    return upload("wide.png", image_bytes(600, 300, "PNG", "orange"), "image/png")
+
+def test_default_thumbnail(client, auth_headers, image):
+    response = client.get(f"/api/files/{image['id']}/thumbnail", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert response.headers["cache-control"] == "private, max-age=31536000, immutable"
+    assert thumbnail_size(response) == (128, 64)
+
+def test_thumbnail_size(client, auth_headers, image):
+    response = client.get(f"/api/files/{image['id']}/thumbnail?size=512", headers=auth_headers)
+
+    assert thumbnail_size(response) == (512, 256)
+    assert response.headers["etag"].endswith('-512"')
+
+def test_unknown_thumbnail_size(client, auth_headers, image):
+    response = client.get(f"/api/files/{image['id']}/thumbnail?size=300", headers=auth_headers)
+
+    assert response.status_code == 400
+
+def test_thumbnail_revalidates(client, auth_headers, image):
+    url = f"/api/files/{image['id']}/thumbnail"
+    etag = client.get(url, headers=auth_headers).headers["etag"]
+
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+def test_non_images_have_no_thumbnail(client, auth_headers, upload):
+    file = upload("notes.txt", b"not a picture", "text/plain")
+
+    assert client.get(f"/api/files/{file['id']}/thumbnail", headers=auth_headers).status_code == 404
+
+def test_thumbnails_of_other_users_are_hidden(client, register, image):
+    assert client.get(f"/api/files/{image['id']}/thumbnail", headers=register()).status_code == 404
+
+@pytest.mark.filterwarnings("ignore::PIL.Image.DecompressionBombWarning")
+def test_only_draft_decodable_images_may_exceed_pixel_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.config.settings.THUMBNAIL_FOLDER", str(tmp_path / "thumbnails"))
+    # Past the limit, but not so far that Image.open refuses the file outright
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 400_000)
+    jpeg, png = tmp_path / "big.jpg", tmp_path / "big.png"
+    jpeg.write_bytes(image_bytes(800, 800, "JPEG"))
+    png.write_bytes(image_bytes(800, 800, "PNG"))
+
+    with Image.open(generate_thumbnail(str(jpeg), "jpeg", 128)) as thumbnail:
+        assert thumbnail.size == (128, 128)
+    with pytest.raises(Image.DecompressionBombError):
+        generate_thumbnail(str(png), "png", 128)
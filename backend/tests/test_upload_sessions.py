@@ -0,0 +1,105 @@
+import hashlib
+
+import pytest
+from sqlalchemy import BigInteger
+
+from app.config import settings
+from app.models.blob import Blob
+from app.models.file import File
+from app.models.upload_session import UploadSession
+
+@pytest.fixture
+def start(client, auth_headers):
+    """Start a resumable upload, returning its URL."""
+    def start(file_size, sha256=None, filename="big.txt"):
+        response = client.post("/api/files/uploads", json={
+            "filename": filename,
+            "file_size": file_size,
+            "file_type": "text/plain",
+            "sha256": sha256,
+        }, headers=auth_headers)
+        assert response.status_code == 201, response.text
+        return f"/api/files/uploads/{response.json()['id']}"
+    return start
+
+def put_chunk(client, headers, url, offset, chunk):
+    return client.put(f"{url}?offset={offset}", content=chunk, headers=headers)
+
+def test_chunks_are_assembled_into_a_file(client, auth_headers, start):
+    content = b"resumable " * 100
+    url = start(len(content), hashlib.sha256(content).hexdigest())
+
+    assert put_chunk(client, auth_headers, url, 0, content[:300]).json()["received_size"] == 300
+    assert put_chunk(client, auth_headers, url, 300, content[300:]).json()["received_size"] == len(content)
+    response = client.post(f"{url}/complete", headers=auth_headers)
+
+    assert response.status_code == 201
+    file = response.json()
+    assert file["original_filename"] == "big.txt"
+    assert file["file_size"] == len(content)
+    assert client.get(f"/api/files/{file['id']}/content", headers=auth_headers).content == content
+
+def test_chunk_at_wrong_offset_is_rejected(client, auth_headers, start):
+    url = start(20)
+    put_chunk(client, auth_headers, url, 0, b"0123456789")
+
+    response = put_chunk(client, auth_headers, url, 5, b"56789")
+
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Expected offset 10, got 5"
+    assert client.get(url, headers=auth_headers).json()["received_size"] == 10
+
+def test_chunk_past_announced_size_is_rejected(client, auth_headers, start):
+    url = start(8)
+    put_chunk(client, auth_headers, url, 0, b"1234")
+
+    response = put_chunk(client, auth_headers, url, 4, b"56789")
+
+    assert response.status_code == 413
+    assert client.get(url, headers=auth_headers).json()["received_size"] == 4
+
+def test_oversized_upload_is_refused_up_front(client, auth_headers):
+    response = client.post("/api/files/uploads", json={
+        "filename": "huge.txt",
+        "file_size": settings.UPLOAD_SESSION_MAX_SIZE + 1,
+    }, headers=auth_headers)
+
+    assert response.status_code == 413
+
+def test_incomplete_upload_cannot_be_completed(client, auth_headers, start):
+    url = start(10)
+    put_chunk(client, auth_headers, url, 0, b"12345")
+
+    response = client.post(f"{url}/complete", headers=auth_headers)
+
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Upload incomplete: received 5 of 10 bytes"
+
+def test_checksum_mismatch_drops_the_upload(client, auth_headers, start):
+    url = start(9, hashlib.sha256(b"expected!").hexdigest())
+    put_chunk(client, auth_headers, url, 0, b"corrupted")
+
+    response = client.post(f"{url}/complete", headers=auth_headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Checksum mismatch, the upload has to be restarted"
+    assert client.get(url, headers=auth_headers).status_code == 404
+    assert client.get("/api/files/", headers=auth_headers).json()["total"] == 0
+
+def test_upload_is_completed_only_once(client, auth_headers, start):
+    url = start(8)
+    put_chunk(client, auth_headers, url, 0, b"one time")
+
+    assert client.post(f"{url}/complete", headers=auth_headers).status_code == 201
+    assert client.post(f"{url}/complete", headers=auth_headers).status_code == 404
+    assert client.get("/api/files/", headers=auth_headers).json()["total"] == 1
+
+def test_sessions_of_other_users_are_hidden(client, register, start):
+    url = start(4)
+
+    assert put_chunk(client, register(), url, 0, b"mine").status_code == 404
+
+@pytest.mark.parametrize("column", [UploadSession.total_size, Blob.file_size, File.file_size])
+def test_size_columns_hold_more_than_2gib(column):
+    # Integer columns overflow on PostgreSQL and SQL Server past 2 GiB
+    assert isinstance(column.type, BigInteger)
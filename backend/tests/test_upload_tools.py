@@ -0,0 +1,80 @@
+import os
+
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.blob import Blob
+from app.models.file import File
+from app.core.storage import storage
+from app.tools.gc_uploads import collect
+from app.tools.migrate_uploads import migrate
+
+def flatten(file_id):
+    """Move a file's content to where uploads lived before sharding, as an old upload would be."""
+    with SessionLocal() as db:
+        file = db.get(File, file_id)
+        flat_path = os.path.join(settings.UPLOAD_FOLDER, file.filename)
+        os.replace(file.file_path, flat_path)
+        db.execute(update(Blob).where(Blob.content_hash == file.content_hash).values(file_path=flat_path))
+        db.execute(update(File).where(File.content_hash == file.content_hash).values(file_path=flat_path))
+        db.commit()
+        return flat_path
+
+def file_path(file_id):
+    with SessionLocal() as db:
+        return db.scalar(select(File.file_path).where(File.id == file_id))
+
+def run_gc(tmp_path):
+    return collect(workers=2, rate=0, min_age=0, state_file=str(tmp_path / "gc-state.json"))
+
+def test_migrate_moves_content_and_repoints_rows(upload):
+    first = upload("a.txt", b"migrate me", "text/plain")
+    second = upload("b.txt", b"migrate me", "text/plain")  # Same content, same blob
+    flat_path = flatten(first["id"])
+
+    migrate(batch_size=1, rate=0)
+
+    assert not os.path.exists(flat_path)
+    sharded_path = storage.key_for(first["filename"])
+    assert file_path(first["id"]) == file_path(second["id"]) == sharded_path
+    with open(sharded_path, "rb") as f:
+        assert f.read() == b"migrate me"
+
+def test_gc_removes_copies_left_by_keep_source(upload, tmp_path):
+    file = upload("c.txt", b"keep the source", "text/plain")
+    flat_path = flatten(file["id"])
+
+    migrate(batch_size=100, rate=0, keep_source=True)
+    assert os.path.exists(flat_path)
+
+    run_gc(tmp_path)
+
+    # The flat copy has the same name as the referenced one, but isn't referenced
+    assert not os.path.exists(flat_path)
+    assert os.path.exists(file_path(file["id"]))
+
+def test_gc_removes_orphans_only(client, auth_headers, upload, tmp_path):
+    kept = upload("d.txt", b"still referenced", "text/plain")
+    orphan = storage.key_for("f" * 64 + ".0badc0de")
+    os.makedirs(os.path.dirname(orphan), exist_ok=True)
+    with open(orphan, "wb") as f:
+        f.write(b"nobody points here")
+
+    stats = run_gc(tmp_path)
+
+    assert not os.path.exists(orphan)
+    assert os.path.exists(file_path(kept["id"]))
+    assert stats.deleted >= 1
+    assert client.get(f"/api/files/{kept['id']}/content", headers=auth_headers).content == b"still referenced"
+
+def test_gc_dry_run_deletes_nothing(tmp_path):
+    orphan = storage.key_for("e" * 64 + ".0badc0de")
+    os.makedirs(os.path.dirname(orphan), exist_ok=True)
+    with open(orphan, "wb") as f:
+        f.write(b"orphan")
+
+    collect(workers=1, rate=0, min_age=0, state_file=str(tmp_path / "state.json"), dry_run=True)
+
+    assert os.path.exists(orphan)
+    os.remove(orphan)
@@ -0,0 +1,169 @@
+import hashlib
+import os
+
+import pytest
+from sqlalchemy import select
+
+from app.api import files as files_api
+from app.config import settings
+from app.database import SessionLocal
+from app.models.blob import Blob
+from app.models.user import User
+from app.core.uploads import UploadSizeLimitMiddleware, save_upload_file
+
+def blob_for(content_hash):
+    with SessionLocal() as db:
+        return db.scalar(select(Blob).where(Blob.content_hash == content_hash))
+
+def test_identical_uploads_share_one_blob(upload):
+    first = upload("a.txt", b"same bytes", "text/plain")
+    second = upload("b.txt", b"same bytes", "text/plain")
+
+    assert first["filename"] == second["filename"]
+    assert first["original_filename"] == "a.txt"
+    assert second["original_filename"] == "b.txt"
+    blob = blob_for(first["filename"].split(".")[0])
+    assert blob.ref_count == 2
+    assert os.path.isfile(blob.file_path)
+
+def test_upload_of_parsed_content_reuses_result(client, auth_headers, upload, process):
+    parsed = upload("c.csv", b"x,y\n1,2\n", "text/csv")
+    process(parsed["id"])
+
+    copy = upload("d.csv", b"x,y\n1,2\n", "text/csv")
+
+    assert copy["status"] == "completed"
+    assert isinstance(copy["processing_result"], dict)
+    assert copy["processing_result"]["column_names"] == ["x", "y"]
+
+def test_content_is_removed_with_its_last_file(client, auth_headers, upload):
+    first = upload("e.txt", b"ref counted", "text/plain")
+    second = upload("f.txt", b"ref counted", "text/plain")
+    content_hash = first["filename"].split(".")[0]
+    path = blob_for(content_hash).file_path
+
+    assert client.delete(f"/api/files/{first['id']}", headers=auth_headers).status_code == 204
+    assert blob_for(content_hash).ref_count == 1
+    assert os.path.isfile(path)
+    assert client.get(f"/api/files/{second['id']}/content", headers=auth_headers).content == b"ref counted"
+
+    assert client.delete(f"/api/files/{second['id']}", headers=auth_headers).status_code == 204
+    assert blob_for(content_hash) is None
+    assert not os.path.exists(path)
+
+def test_reupload_after_delete_stores_content_again(client, auth_headers, upload):
+    first = upload("g.txt", b"come back", "text/plain")
+    client.delete(f"/api/files/{first['id']}", headers=auth_headers)
+
+    again = upload("g.txt", b"come back", "text/plain")
+
+    assert client.get(f"/api/files/{again['id']}/content", headers=auth_headers).content == b"come back"
+    assert blob_for(again["filename"].split(".")[0]).ref_count == 1
+
+def upload_batch(client, headers, *files):
+    return client.post(
+        "/api/files/upload/batch",
+        files=[("files", (name, content, "text/plain")) for name, content in files],
+        headers=headers
+    )
+
+def file_count(client, headers):
+    user_id = client.get("/api/auth/me", headers=headers).json()["id"]
+    with SessionLocal() as db:
+        return db.scalar(select(User.file_count).where(User.id == user_id))
+
+def test_batch_of_valid_files_is_created(client, auth_headers):
+    response = upload_batch(client, auth_headers, ("h.txt", b"batch one"), ("i.txt", b"batch two"))
+
+    assert response.status_code == 201
+    body = response.json()
+    assert (body["created"], body["failed"]) == (2, 0)
+    assert [item["file"]["original_filename"] for item in body["files"]] == ["h.txt", "i.txt"]
+    assert file_count(client, auth_headers) == 2
+
+def test_batch_reports_rejected_files(client, auth_headers):
+    response = upload_batch(client, auth_headers, ("j.txt", b"kept"), ("k.exe", b"rejected"))
+
+    assert response.status_code == 207
+    body = response.json()
+    assert (body["created"], body["failed"]) == (1, 1)
+    rejected = body["files"][1]
+    assert rejected["original_filename"] == "k.exe"
+    assert rejected["status_code"] == 400
+    assert rejected["error"].startswith("File type not allowed")
+    assert rejected.get("file") is None
+    assert file_count(client, auth_headers) == 1
+
+def test_batch_without_valid_files_fails(client, auth_headers):
+    response = upload_batch(client, auth_headers, ("l.exe", b"no"), ("m.sh", b"nope"))
+
+    assert response.status_code == 400
+    assert response.json()["created"] == 0
+    assert file_count(client, auth_headers) == 0
+
+def test_identical_files_in_a_batch_share_one_blob(client, auth_headers):
+    response = upload_batch(client, auth_headers, ("n.txt", b"twice in a batch"), ("o.txt", b"twice in a batch"))
+
+    first, second = (item["file"] for item in response.json()["files"])
+    assert first["filename"] == second["filename"]
+    assert blob_for(first["filename"].split(".")[0]).ref_count == 2
+
+def test_failed_batch_leaves_nothing_in_staging(client, auth_headers, monkeypatch):
+    staged = []
+
+    async def save_or_fail(upload, file_path):
+        if upload.filename == "boom.txt":
+            raise RuntimeError("disk failed")
+        staged.append(file_path)
+        return await save_upload_file(upload, file_path)
+
+    monkeypatch.setattr(files_api, "save_upload_file", save_or_fail)
+
+    with pytest.raises(RuntimeError):
+        upload_batch(client, auth_headers, ("p.txt", b"staged one"), ("boom.txt", b"x"), ("q.txt", b"staged two"))
+
+    assert len(staged) == 2
+    assert not any(os.path.exists(path) for path in staged)
+    assert file_count(client, auth_headers) == 0
+
+def staging_files():
+    staging = os.path.join(settings.UPLOAD_FOLDER, ".tmp")
+    return set(os.listdir(staging)) if os.path.isdir(staging) else set()
+
+def test_upload_records_size_and_checksum(client, auth_headers, upload, monkeypatch):
+    # Several reads per upload, so the size and hash are built up chunk by chunk
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 64)
+    content = b"streamed in chunks " * 50
+
+    file = upload("r.txt", content, "text/plain")
+
+    assert file["file_size"] == len(content)
+    assert file["filename"].split(".")[0] == hashlib.sha256(content).hexdigest()
+
+def test_oversized_upload_is_cut_off_while_streaming(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_CONTENT_LENGTH", 100)
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 64)
+    before = staging_files()
+
+    response = client.post(
+        "/api/files/upload",
+        files={"file": ("s.txt", b"x" * 101, "text/plain")},
+        headers=auth_headers
+    )
+
+    assert response.status_code == 413
+    assert response.json()["detail"] == "File too large. Maximum size is 100 bytes"
+    assert staging_files() == before
+    assert client.get("/api/files/", headers=auth_headers).json()["total"] == 0
+
+def test_oversized_request_is_refused_from_its_headers(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_CONTENT_LENGTH", 100)
+
+    response = client.post(
+        "/api/files/upload",
+        files={"file": ("t.txt", b"x" * (UploadSizeLimitMiddleware.MULTIPART_OVERHEAD + 200), "text/plain")},
+        headers=auth_headers
+    )
+
+    assert response.status_code == 413
+    assert client.get("/api/files/", headers=auth_headers).json()["total"] == 0
@@ -0,0 +1,23 @@
+import asyncio
+
+from app.core.user_cache import RedisBackend, UserCache
+
+def test_redis_outage_falls_through_to_database():
+    # Nothing listens on this port, every command fails to connect
+    backend = RedisBackend("redis://127.0.0.1:1/0", ttl=30)
+
+    async def exercise():
+        assert await backend.get(1) is None
+        await backend.set(1, {"id": 1})
+        await backend.delete(1)
+
+    asyncio.run(exercise())
+    assert backend.errors == 3
+
+def test_redis_outage_keeps_requests_working(client, auth_headers, monkeypatch):
+    cache = UserCache()
+    cache.backend = RedisBackend("redis://127.0.0.1:1/0", ttl=30)
+    monkeypatch.setattr("app.core.security.user_cache", cache)
+
+    assert client.get("/api/auth/me", headers=auth_headers).status_code == 200
+    assert cache.stats()["errors"] > 0
@@ -1,11 +1,11 @@
-import React, { useEffect, useState, useContext } from 'react';
+import React, { useEffect, useContext, useRef } from 'react';
 import { FileContext } from '../../context/FileContext';
+import { subscribeToFileEvents } from '../../services/files';
 import Card from '../ui/Card';
 import Button from '../ui/Button';
 
 const ProcessingStatus = ({ fileId }) => {
-  const [statusInterval, setStatusInterval] = useState(null);
-  const { currentFile, fetchFileById, checkFileStatus, handleReprocessFile, handleDeleteFile, loading } = useContext(FileContext);
+  const { currentFile, fetchFileById, checkFileStatus, applyFileStatus, handleReprocessFile, handleDeleteFile, loading } = useContext(FileContext);
   
   // Fetch file data on component mount
   useEffect(() => {
@@ -16,30 +16,33 @@ const ProcessingStatus = ({ fileId }) => {
     if (fileId) {
       loadFile();
     }
-    
-    return () => {
-      if (statusInterval) {
-        clearInterval(statusInterval);
-      }
-    };
   }, [fileId, fetchFileById]);
   
-  // Set up polling for file status if still processing
+  // checkFileStatus changes on every render; keep the latest without resubscribing
+  const checkFileStatusRef = useRef(checkFileStatus);
+  checkFileStatusRef.current = checkFileStatus;
+  
+  const isProcessing = Boolean(currentFile && (currentFile.status === 'pending' || currentFile.status === 'processing'));
+  const currentFileId = currentFile ? currentFile.id : null;
+  
+  // Listen for status updates while the file is being processed
   useEffect(() => {
-    if (currentFile && (currentFile.status === 'pending' || currentFile.status === 'processing')) {
-      // Check status every 3 seconds
-      const interval = setInterval(() => {
-        checkFileStatus(fileId);
-      }, 3000);
-      
-      setStatusInterval(interval);
-      
-      return () => clearInterval(interval);
-    } else if (statusInterval) {
-      clearInterval(statusInterval);
-      setStatusInterval(null);
+    if (!isProcessing) {
+      return undefined;
     }
-  }, [currentFile, fileId, checkFileStatus]);
+    
+    const unsubscribe = subscribeToFileEvents([currentFileId], applyFileStatus);
+    if (unsubscribe) {
+      return unsubscribe;
+    }
+    
+    // Fall back to checking the status every 3 seconds
+    const interval = setInterval(() => {
+      checkFileStatusRef.current(fileId);
+    }, 3000);
+    
+    return () => clearInterval(interval);
+  }, [isProcessing, currentFileId, fileId, applyFileStatus]);
   
   // Handle reprocess button click
   const handleReprocess = async () => {
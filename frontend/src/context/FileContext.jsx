@@ -1,4 +1,4 @@
-import React, { createContext, useState, useEffect, useContext } from 'react';
+import React, { createContext, useState, useEffect, useContext, useCallback } from 'react';
 import { AuthContext } from './AuthContext';
 import { 
   uploadFile, 
@@ -89,6 +89,18 @@ export const FileProvider = ({ children }) => {
     }
   };
 
+  // Apply a pushed status update to the current file and the files list
+  // (stable identity, so subscribers don't reconnect on every render)
+  const applyFileStatus = useCallback((data) => {
+    setCurrentFile(prev => (prev && prev.id === data.file_id
+      ? { ...prev, status: data.status, processing_result: data.processing_result }
+      : prev
+    ));
+    setFiles(prev => prev.map(file =>
+      file.id === data.file_id ? { ...file, status: data.status } : file
+    ));
+  }, []);
+
   // Upload a new file
   const handleFileUpload = async (file, onSuccess) => {
     if (!isAuthenticated || !file) return;
@@ -125,7 +137,12 @@ export const FileProvider = ({ children }) => {
     setError(null);
     
     try {
-      await reprocessFile(fileId);
+      const { outcome } = await reprocessFile(fileId);
+      
+      // Unchanged and reused results arrive without a new run; status events report them
+      if (outcome !== 'queued') {
+        return true;
+      }
       
       // Update the file status
       if (currentFile && currentFile.id === parseInt(fileId)) {
@@ -190,6 +207,7 @@ export const FileProvider = ({ children }) => {
         fetchUserFiles,
         fetchFileById,
         checkFileStatus,
+        applyFileStatus,
         handleFileUpload,
         handleReprocessFile,
         handleDeleteFile
@@ -1,5 +1,11 @@
 import api from './api';
 
+// Files above this size are sent in chunks that survive a dropped connection
+const RESUMABLE_UPLOAD_THRESHOLD = 8 * 1024 * 1024;
+const UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024;
+
+const resumeKey = (file) => `upload:${file.name}:${file.size}:${file.lastModified}`;
+
 /**
  * Upload a file
  * @param {File} file - The file to upload
@@ -7,6 +13,10 @@ import api from './api';
  * @returns {Promise} - Promise with file data
  */
 export const uploadFile = async (file, onUploadProgress) => {
+  if (file.size > RESUMABLE_UPLOAD_THRESHOLD) {
+    return uploadFileResumable(file, onUploadProgress);
+  }
+
   const formData = new FormData();
   formData.append('file', file);
 
@@ -28,13 +38,65 @@ export const uploadFile = async (file, onUploadProgress) => {
 };
 
 /**
- * Get all files for the current user
- * @param {number} skip - Number of items to skip for pagination
+ * Upload a file through a resumable upload session, one chunk per request.
+ * An interrupted upload of the same file continues where it stopped.
+ * @param {File} file - The file to upload
+ * @param {Function} onUploadProgress - Callback for upload progress
+ * @returns {Promise} - Promise with file data
+ */
+export const uploadFileResumable = async (file, onUploadProgress) => {
+  let session = null;
+  const savedId = localStorage.getItem(resumeKey(file));
+  if (savedId) {
+    try {
+      session = (await api.get(`/files/uploads/${savedId}`)).data;
+    } catch (error) {
+      localStorage.removeItem(resumeKey(file));
+    }
+  }
+  if (!session) {
+    session = (await api.post('/files/uploads', {
+      filename: file.name,
+      file_size: file.size,
+      file_type: file.type || null,
+    })).data;
+    localStorage.setItem(resumeKey(file), session.id);
+  }
+
+  let offset = session.received_size;
+  while (offset < file.size) {
+    const chunk = file.slice(offset, offset + UPLOAD_CHUNK_SIZE);
+    const start = offset;
+    const response = await api.put(`/files/uploads/${session.id}`, chunk, {
+      params: { offset },
+      headers: { 'Content-Type': 'application/octet-stream' },
+      onUploadProgress: (progressEvent) => {
+        if (onUploadProgress) {
+          onUploadProgress(Math.round(((start + progressEvent.loaded) * 100) / file.size));
+        }
+      },
+    });
+    offset = response.data.received_size;
+  }
+
+  const response = await api.post(`/files/uploads/${session.id}/complete`);
+  localStorage.removeItem(resumeKey(file));
+  return response.data;
+};
+
+/**
+ * Get a page of files for the current user
+ * @param {string|null} cursor - next_cursor from the previous page, or null for the first page
  * @param {number} limit - Number of items to return
- * @returns {Promise} - Promise with files data
+ * @param {Object} options - Optional status / file_type filters and sort / order
+ * @returns {Promise} - Promise with files data, including next_cursor
  */
-export const getUserFiles = async (skip = 0, limit = 100) => {
-  const response = await api.get(`/files?skip=${skip}&limit=${limit}`);
+export const getUserFiles = async (cursor = null, limit = 100, options = {}) => {
+  const params = { limit, ...options };
+  if (cursor) {
+    params.cursor = cursor;
+  }
+  const response = await api.get('/files', { params });
   return response.data;
 };
 
@@ -58,13 +120,37 @@ export const getFileStatus = async (fileId) => {
   return response.data;
 };
 
+/**
+ * URL of a file's uploaded content, usable directly as an <img> src or link
+ * @param {number} fileId - The file ID
+ * @param {boolean} download - Ask the browser to save the file instead of showing it
+ * @returns {string} - Content URL; the server answers repeat requests with 304 and supports Range
+ */
+export const getFileContentUrl = (fileId, download = false) => {
+  // Elements can't send an Authorization header, so the token goes in the query
+  const params = new URLSearchParams({ access_token: localStorage.getItem('token') || '' });
+  if (download) {
+    params.set('download', 'true');
+  }
+  return `${api.defaults.baseURL}/files/${fileId}/content?${params}`;
+};
+
+// Random key per reprocess request
+const newIdempotencyKey = () =>
+  window.crypto?.randomUUID?.() || `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+
 /**
  * Reprocess a file
  * @param {number} fileId - The file ID
- * @returns {Promise} - Promise with reprocess result
+ * @param {Object} options - skipUnchanged: keep results already produced by the current parsers;
+ *   idempotencyKey: identifies this request, so sending it again doesn't schedule another run
+ * @returns {Promise} - Promise with reprocess result; outcome is queued, already_queued, unchanged or reused
  */
-export const reprocessFile = async (fileId) => {
-  const response = await api.post(`/files/${fileId}/reprocess`);
+export const reprocessFile = async (fileId, { skipUnchanged = false, idempotencyKey = newIdempotencyKey() } = {}) => {
+  const response = await api.post(`/files/${fileId}/reprocess`, null, {
+    params: skipUnchanged ? { skip_unchanged: true } : undefined,
+    headers: { 'Idempotency-Key': idempotencyKey },
+  });
   return response.data;
 };
 
@@ -76,4 +162,29 @@ export const reprocessFile = async (fileId) => {
 export const deleteFile = async (fileId) => {
   const response = await api.delete(`/files/${fileId}`);
   return response.data;
-};
\ No newline at end of file
+};
+
+/**
+ * Subscribe to processing status changes of one or more files
+ * @param {Array<number>} fileIds - The file IDs to watch
+ * @param {Function} onStatus - Called with each { file_id, status, updated_at, processing_result }
+ * @returns {Function|null} - Function that closes the subscription, or null if EventSource is unsupported
+ */
+export const subscribeToFileEvents = (fileIds, onStatus) => {
+  if (typeof EventSource === 'undefined') {
+    return null;
+  }
+  
+  // EventSource can't send an Authorization header, so the token goes in the query
+  const params = new URLSearchParams({
+    ids: fileIds.join(','),
+    access_token: localStorage.getItem('token') || ''
+  });
+  const source = new EventSource(`${api.defaults.baseURL}/files/events?${params}`);
+  
+  source.addEventListener('status', (event) => onStatus(JSON.parse(event.data)));
+  // The server ends the stream once every file is done; stop the browser from reconnecting
+  source.addEventListener('done', () => source.close());
+  
+  return () => source.close();
+};